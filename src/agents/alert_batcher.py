@@ -0,0 +1,107 @@
+"""
+告警微批处理
+在短时间窗口内合并并发到达的告警，通过一次 LLM 调用完成分析
+"""
+
+import asyncio
+from typing import List, Optional, Set, Tuple
+
+from ..dspy_modules.alert_analyzer import AlertAnalyzer, AlertInfo, AlertAnalysisResult
+
+
+class AlertBatcher:
+    """告警微批处理器
+    
+    submit() 将告警放入队列并等待结果；后台消费协程每次最多取 max_batch 条，
+    或在第一条到达后等待 batch_window_ms，再调用 AlertAnalyzer.analyze_batch
+    """
+    
+    def __init__(self, analyzer: AlertAnalyzer, max_batch: int = 16, batch_window_ms: int = 20):
+        self.analyzer = analyzer
+        self.max_batch = max(1, max_batch)
+        self.batch_window = batch_window_ms / 1000
+        self._queue: Optional[asyncio.Queue] = None
+        self._consumer: Optional[asyncio.Task] = None
+        self._pending: Set[asyncio.Future] = set()  # 尚未得到结果的 submit() 调用
+    
+    async def submit(self, alert_info: AlertInfo) -> AlertAnalysisResult:
+        """提交告警并等待分析结果"""
+        self._ensure_consumer()
+        future = asyncio.get_running_loop().create_future()
+        self._pending.add(future)
+        future.add_done_callback(self._pending.discard)
+        await self._queue.put((alert_info, future))
+        return await future
+    
+    async def close(self) -> None:
+        """停止后台消费协程
+        
+        队列中和正在分析的告警都不会再有结果，对应的 submit() 调用抛出 RuntimeError
+        """
+        if self._consumer is not None:
+            self._consumer.cancel()
+            try:
+                await self._consumer
+            except asyncio.CancelledError:
+                pass
+        
+        if self._queue is not None:
+            while not self._queue.empty():
+                self._queue.get_nowait()
+        for future in list(self._pending):
+            if not future.done():
+                future.set_exception(RuntimeError("AlertBatcher closed"))
+        self._pending.clear()
+        
+        self._consumer = None
+        self._queue = None
+    
+    def _ensure_consumer(self) -> None:
+        """在当前事件循环中启动消费协程（首次调用或事件循环更换时）"""
+        if self._consumer is None or self._consumer.done() or \
+                self._consumer.get_loop() is not asyncio.get_running_loop():
+            self._queue = asyncio.Queue()
+            self._consumer = asyncio.create_task(self._consume())
+    
+    async def _collect_batch(self) -> List[Tuple[AlertInfo, asyncio.Future]]:
+        """收集一个批次：至少一条，最多 max_batch 条或到达时间窗口"""
+        batch = [await self._queue.get()]
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.batch_window
+        
+        while len(batch) < self.max_batch:
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), remaining))
+            except asyncio.TimeoutError:
+                break
+        
+        return batch
+    
+    async def _consume(self) -> None:
+        """后台消费协程"""
+        while True:
+            batch = await self._collect_batch()
+            alerts = [alert_info for alert_info, _ in batch]
+            
+            try:
+                results = await asyncio.to_thread(self.analyzer.analyze_batch, alerts)
+            except Exception as e:
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+            
+            for (_, future), result in zip(batch, results):
+                if not future.done():
+                    future.set_result(result)
+            if len(results) != len(batch):
+                # 结果条数少于提交的告警时，未得到结果的调用方不能一直等待
+                error = RuntimeError(
+                    f"analyze_batch returned {len(results)} results for {len(batch)} alerts"
+                )
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(error)
@@ -0,0 +1,94 @@
+"""
+事件日志
+
+以列式 numpy 数组记录已处理事件，供智能体统计性能指标。
+单独成模块，使 numpy/numba 只在创建智能体时才导入
+"""
+
+from datetime import datetime
+
+import numpy as np
+
+try:
+    from numba import njit
+except ImportError:  # numba 为可选依赖，缺失时使用 numpy 实现
+    njit = None
+
+
+def _mean_loop(values: np.ndarray) -> float:
+    """数组均值（可由 numba 编译的循环实现）"""
+    total = 0.0
+    for value in values:
+        total += value
+    return total / values.size if values.size else 0.0
+
+
+if njit is not None:
+    _avg_resolution = njit(cache=True, fastmath=True)(_mean_loop)
+    _success_rate = njit(cache=True)(_mean_loop)
+    # 导入时预热，避免首次统计时触发 JIT 编译
+    _avg_resolution(np.zeros(1, dtype=np.float32))
+    _success_rate(np.zeros(1, dtype=np.bool_))
+else:
+    def _avg_resolution(times: np.ndarray) -> float:
+        return float(times.mean()) if times.size else 0.0
+
+    def _success_rate(flags: np.ndarray) -> float:
+        return float(flags.mean()) if flags.size else 0.0
+
+
+class IncidentLog:
+    """事件日志
+    
+    以列式数组存储已处理事件，指标统计直接在数组上做向量化计算。
+    记录数达到容量上限后作为环形缓冲区覆盖最旧的记录
+    """
+    
+    __slots__ = ("capacity", "_size", "_next", "timestamps", "resolution_seconds",
+                 "success", "task_types")
+    
+    def __init__(self, capacity: int = 10_000, initial_capacity: int = 64):
+        self.capacity = max(1, capacity)
+        self._size = 0
+        self._next = 0  # 缓冲区写满后下一个覆盖的位置
+        initial_capacity = min(initial_capacity, self.capacity)
+        self.timestamps = np.empty(initial_capacity, dtype="datetime64[ms]")
+        self.resolution_seconds = np.empty(initial_capacity, dtype=np.float32)
+        self.success = np.empty(initial_capacity, dtype=np.bool_)
+        self.task_types = np.empty(initial_capacity, dtype=np.int8)  # TaskType 取值，-1 表示未知
+    
+    def __len__(self) -> int:
+        return self._size
+    
+    def append(self, timestamp: datetime, resolution_seconds: float,
+               success: bool, task_type: int = -1) -> None:
+        """追加一条事件记录，task_type 为 TaskType 取值，-1 表示未知"""
+        if self._size < self.capacity:
+            if self._size == len(self.success):
+                self._grow()
+            i = self._size
+            self._size += 1
+        else:
+            i = self._next
+            self._next = (i + 1) % self.capacity
+        self.timestamps[i] = np.datetime64(timestamp, "ms")
+        self.resolution_seconds[i] = resolution_seconds
+        self.success[i] = success
+        self.task_types[i] = task_type
+    
+    def _grow(self) -> None:
+        """容量翻倍（均摊 O(1) 追加），不超过容量上限"""
+        new_capacity = min(self.capacity, max(1, len(self.success) * 2))
+        for name in ("timestamps", "resolution_seconds", "success", "task_types"):
+            old = getattr(self, name)
+            new = np.empty(new_capacity, dtype=old.dtype)
+            new[:self._size] = old[:self._size]
+            setattr(self, name, new)
+    
+    def avg_resolution_time(self) -> float:
+        """平均处理时间（秒）"""
+        return float(_avg_resolution(self.resolution_seconds[:self._size]))
+    
+    def success_rate(self) -> float:
+        """成功率"""
+        return float(_success_rate(self.success[:self._size]))
@@ -4,21 +4,167 @@
 基于 LangGraph 的智能运维智能体实现
 """
 
+from __future__ import annotations
+
 import asyncio
-from typing import Dict, Any, List, Optional, Union
+import copy
+import importlib
+import os
+import sys
+import time
+from pathlib import Path
+from typing import TYPE_CHECKING, Dict, Any, List, Optional, Tuple, Union
 from datetime import datetime
-from dataclasses import dataclass
+from dataclasses import dataclass, field
+from enum import IntEnum
 from typing_extensions import TypedDict
 
 from langgraph.graph import StateGraph, END
-from ..dspy_modules.alert_analyzer import AlertInfo, AlertAnalyzer
-from ..dspy_modules.diagnostic_agent import DiagnosticAgent
-from ..dspy_modules.action_planner import ActionPlanner
-from ..dspy_modules.report_generator import ReportGenerator
-from ..utils.llm_config import setup_deepseek_llm, get_llm_config_from_env
+from ..dspy_modules.models import AlertInfo
+from ..utils.cache import LRUCache, fingerprint
+from ..utils.serialization import dumps_bytes
+
+if TYPE_CHECKING:
+    import dspy
+    from ..dspy_modules.alert_analyzer import AlertAnalyzer, AlertAnalysisResult
+    from ..dspy_modules.diagnostic_agent import DiagnosticAgent, DiagnosticContext, DiagnosticResult
+    from ..dspy_modules.action_planner import ActionPlanner, ActionPlan
+    from ..dspy_modules.report_generator import ReportGenerator
+    from .alert_batcher import AlertBatcher
+    from .incident_log import IncidentLog
+
+
+# 行动计划序列化时保留的步骤字段
+_STEP_FIELDS = frozenset({
+    "step_id", "action_type", "description", "command",
+    "timeout", "risk_level", "dependencies"
+})
+_ROLLBACK_STEP_FIELDS = frozenset({"step_id", "description", "command"})
+
+class TaskStatus(IntEnum):
+    """任务及执行结果状态"""
+    SUCCESS = 0
+    COMPLETED_WITH_ERRORS = 1
+    COMPLETED = 2
+    ERROR = 3
+    FAILED = 4
+    PARTIAL = 5
+    MANUAL_APPROVAL_REQUIRED = 6
+
+
+# 对外返回的状态字符串，按 TaskStatus 取值索引
+_STATUS_STR = tuple(sys.intern(s) for s in (
+    "success", "completed_with_errors", "completed", "error",
+    "failed", "partial", "manual_approval_required"
+))
+
+
+class TaskType(IntEnum):
+    """智能体任务类型"""
+    PROCESS_ALERT = 0
+    DIAGNOSE_ISSUE = 1
+    PLAN_ACTIONS = 2
+    EXECUTE_ACTIONS = 3
+    GENERATE_REPORT = 4
+    LEARN_FEEDBACK = 5
+    HANDLE_ALERT = 6
+
+
+# 任务类型字符串，按 TaskType 取值索引
+_TASK_TYPE_STR = tuple(sys.intern(s) for s in (
+    "process_alert", "diagnose_issue", "plan_actions", "execute_actions",
+    "generate_report", "learn_feedback", "handle_alert"
+))
+_TASK_TYPE_BY_STR = {name: TaskType(i) for i, name in enumerate(_TASK_TYPE_STR)}
+
+# 智能体图中可路由的任务类型
+_ROUTABLE_TASKS = frozenset(_TASK_TYPE_STR[:TaskType.HANDLE_ALERT])
+
+# DSPy 模块名称到 (模块路径, 类名) 的映射，首次使用时才导入
+_DSPY_MODULE_FACTORIES = {
+    "alert_analyzer": ("..dspy_modules.alert_analyzer", "AlertAnalyzer"),
+    "diagnostic_agent": ("..dspy_modules.diagnostic_agent", "DiagnosticAgent"),
+    "action_planner": ("..dspy_modules.action_planner", "ActionPlanner"),
+    "report_generator": ("..dspy_modules.report_generator", "ReportGenerator"),
+}
+
+
+def _module_factory(name: str) -> type:
+    """按路径导入 DSPy 模块类"""
+    module_name, class_name = _DSPY_MODULE_FACTORIES[name]
+    return getattr(importlib.import_module(module_name, __package__), class_name)
+
+
+# 已编译的 DSPy 程序，按 (专业化键, 模块名) 在智能体间共享
+_COMPILED_PROGRAMS: Dict[Tuple[str, str], dspy.Module] = {}
 
+_last_ts = (0, "")  # (毫秒时间戳, ISO 字符串)
 
-@dataclass
+
+def _ts() -> str:
+    """当前时间的 ISO 字符串（毫秒精度，同一毫秒内复用格式化结果）"""
+    global _last_ts
+    now_ms = time.time_ns() // 1_000_000
+    cached_ms, cached_iso = _last_ts
+    if now_ms != cached_ms:
+        cached_iso = datetime.fromtimestamp(now_ms / 1000).isoformat(timespec="milliseconds")
+        _last_ts = (now_ms, cached_iso)
+    return cached_iso
+
+
+def _serialize_response(payload: Dict[str, Any]) -> bytes:
+    """将响应序列化为 JSON 字节串（供 Web 处理器直接返回）"""
+    return dumps_bytes(payload)
+
+
+def _analysis_to_dict(analysis: AlertAnalysisResult) -> Dict[str, Any]:
+    """告警分析结果转为响应字典"""
+    return {
+        "priority": analysis.priority,
+        "category": analysis.category,
+        "urgency_score": analysis.urgency_score,
+        "root_cause_hints": analysis.root_cause_hints,
+        "recommended_actions": analysis.recommended_actions
+    }
+
+
+def _diagnosis_to_dict(diagnosis: DiagnosticResult) -> Dict[str, Any]:
+    """诊断结果转为响应字典"""
+    return {
+        "root_cause": diagnosis.root_cause,
+        "confidence_score": diagnosis.confidence_score,
+        "impact_assessment": diagnosis.impact_assessment,
+        "affected_components": diagnosis.affected_components,
+        "business_impact": diagnosis.business_impact,
+        "recovery_estimate": diagnosis.recovery_time_estimate,
+        "similar_incidents": diagnosis.similar_incidents,
+        "evidence": diagnosis.evidence
+    }
+
+
+def _action_plan_to_dict(action_plan: ActionPlan) -> Dict[str, Any]:
+    """行动计划转为响应字典"""
+    return {
+        "plan_id": action_plan.plan_id,
+        "priority": action_plan.priority,
+        "estimated_duration": action_plan.estimated_duration,
+        "risk_assessment": action_plan.risk_assessment,
+        "approval_required": action_plan.approval_required,
+        "steps": [
+            step.model_dump(include=_STEP_FIELDS)
+            for step in action_plan.steps
+        ],
+        "rollback_plan": [
+            step.model_dump(include=_ROLLBACK_STEP_FIELDS)
+            for step in action_plan.rollback_plan
+        ],
+        "pre_checks": action_plan.pre_checks,
+        "post_checks": action_plan.post_checks,
+        "notifications": action_plan.notifications
+    }
+
+
+@dataclass(slots=True, frozen=True)
 class AgentConfig:
     """智能体配置"""
     agent_id: str
@@ -29,6 +175,14 @@ class AgentConfig:
     enable_learning: bool = True
     enable_reporting: bool = True
     auto_execution: bool = False
+    max_concurrent_steps: int = 8  # 同一批次内并发执行的步骤上限
+    alert_cache_size: int = 128  # 告警处理结果缓存容量，0 表示禁用
+    alert_cache_ttl: float = 300.0  # 告警处理结果缓存有效期（秒）
+    # 已编译 DSPy 程序的保存目录，可由 COMPILED_MODULES_PATH 环境变量指定
+    compiled_dir: str = field(default_factory=lambda: os.getenv("COMPILED_MODULES_PATH", "./compiled"))
+    history_capacity: int = 10_000  # 事件日志保留的最大记录数
+    alert_batch_window_ms: int = 0  # 告警微批等待窗口，0 表示不合并
+    alert_max_batch: int = 16  # 单次合并分析的最大告警数
 
 
 class AgentState(TypedDict):
@@ -75,19 +229,84 @@ class AgentState(TypedDict):
     workflow_id: str
 
 
+@dataclass(slots=True)
+class FusedOpsResult:
+    """融合流水线的类型化中间结果"""
+    analysis: AlertAnalysisResult
+    diagnosis: DiagnosticResult
+    action_plan: ActionPlan
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """转换为与智能体图一致的结果字典"""
+        return {
+            "analysis": _analysis_to_dict(self.analysis),
+            "diagnosis": _diagnosis_to_dict(self.diagnosis),
+            "action_plan": _action_plan_to_dict(self.action_plan)
+        }
+
+
+class FusedOpsStage:
+    """融合的告警分析 → 诊断 → 行动规划流水线
+    
+    各阶段之间直接传递 pydantic 结果对象，只在最后转换一次字典
+    """
+    
+    __slots__ = ("alert_analyzer", "diagnostic_agent", "action_planner")
+    
+    def __init__(self, alert_analyzer: AlertAnalyzer, diagnostic_agent: DiagnosticAgent,
+                 action_planner: ActionPlanner):
+        self.alert_analyzer = alert_analyzer
+        self.diagnostic_agent = diagnostic_agent
+        self.action_planner = action_planner
+    
+    def run(self, alert_info: AlertInfo, context: Optional[Dict[str, Any]] = None,
+            historical_alerts: Optional[List[AlertInfo]] = None) -> FusedOpsResult:
+        """依次执行三个阶段（同步调用，由调用方决定是否放到线程中）"""
+        from ..dspy_modules.diagnostic_agent import DiagnosticContext
+        
+        context = context or {}
+        
+        analysis = self.alert_analyzer.forward(
+            alert_info=alert_info,
+            historical_alerts=historical_alerts or []
+        )
+        
+        diagnosis = self.diagnostic_agent.forward(DiagnosticContext(
+            alert_analysis=analysis,
+            system_metrics=context.get("system_metrics") or alert_info.metrics,
+            log_entries=context.get("log_entries", []),
+            historical_incidents=context.get("historical_incidents", []),
+            topology_info=context.get("topology_info", {})
+        ))
+        
+        action_plan = self.action_planner.forward(diagnosis, context)
+        
+        return FusedOpsResult(analysis=analysis, diagnosis=diagnosis, action_plan=action_plan)
+
+
 class IntelligentOpsAgent:
     """智能运维智能体
     
     基于 LangGraph 的智能运维智能体，将智能体本身实现为一个状态图
     """
     
+    __slots__ = (
+        "config", "dspy_lm", "langchain_llm",
+        "_alert_analyzer", "_diagnostic_agent", "_action_planner", "_report_generator",
+        "incident_log", "_alert_result_cache", "graph", "compiled_graph",
+        "_running_tasks", "_status_cache", "_fused_stage",
+        "_alert_batcher", "_alert_cache_hits", "current_state"
+    )
+    
     def __init__(self, config: AgentConfig):
         self.config = config
+        from ..utils.llm_config import setup_cached_llm, get_llm_config_from_env
+        from .incident_log import IncidentLog
         
         # 初始化 LLM (DeepSeek)
         try:
             llm_config = get_llm_config_from_env()
-            self.dspy_lm, self.langchain_llm = setup_deepseek_llm(llm_config)
+            self.dspy_lm, self.langchain_llm = setup_cached_llm(llm_config)
             print(f"✅ LLM 初始化成功: {llm_config.provider} - {llm_config.model_name}")
         except Exception as e:
             print(f"⚠️  LLM 初始化失败: {str(e)}")
@@ -95,11 +314,25 @@ class IntelligentOpsAgent:
             self.dspy_lm = None
             self.langchain_llm = None
         
-        # DSPy 模块
-        self.alert_analyzer = AlertAnalyzer()
-        self.diagnostic_agent = DiagnosticAgent()
-        self.action_planner = ActionPlanner()
-        self.report_generator = ReportGenerator()
+        # DSPy 模块（首次使用时再创建）
+        self._alert_analyzer: Optional[AlertAnalyzer] = None
+        self._diagnostic_agent: Optional[DiagnosticAgent] = None
+        self._action_planner: Optional[ActionPlanner] = None
+        self._report_generator: Optional[ReportGenerator] = None
+        self._fused_stage: Optional[FusedOpsStage] = None
+        self._alert_batcher: Optional[AlertBatcher] = None
+        
+        # 已处理事件日志，用于性能指标统计
+        self.incident_log = IncidentLog(config.history_capacity)
+        
+        # 最近一次任务的状态、运行中的任务数和状态缓存
+        self.current_state: Optional[AgentState] = None
+        self._running_tasks = 0
+        self._status_cache: Optional[Dict[str, Any]] = None
+        
+        # 告警处理结果缓存（重复投递的同一告警直接复用结果）及命中次数
+        self._alert_result_cache = LRUCache(config.alert_cache_size)
+        self._alert_cache_hits = 0
         
         # 构建智能体图
         self.graph = self._build_agent_graph()
@@ -107,6 +340,116 @@ class IntelligentOpsAgent:
         
         print(f"✅ 智能体图构建完成: {config.agent_id}")
     
+    # ==================== DSPy 模块（延迟创建） ====================
+    
+    @property
+    def alert_analyzer(self) -> AlertAnalyzer:
+        return self._get_module("alert_analyzer")
+    
+    @property
+    def diagnostic_agent(self) -> DiagnosticAgent:
+        return self._get_module("diagnostic_agent")
+    
+    @property
+    def action_planner(self) -> ActionPlanner:
+        return self._get_module("action_planner")
+    
+    @property
+    def report_generator(self) -> ReportGenerator:
+        return self._get_module("report_generator")
+    
+    @property
+    def fused_stage(self) -> FusedOpsStage:
+        """告警 → 诊断 → 规划的融合流水线"""
+        if self._fused_stage is None:
+            self._fused_stage = FusedOpsStage(
+                self.alert_analyzer, self.diagnostic_agent, self.action_planner
+            )
+        return self._fused_stage
+    
+    @property
+    def alert_batcher(self) -> AlertBatcher:
+        """并发告警的微批处理器"""
+        if self._alert_batcher is None:
+            from .alert_batcher import AlertBatcher
+            self._alert_batcher = AlertBatcher(
+                self.alert_analyzer,
+                max_batch=self.config.alert_max_batch,
+                batch_window_ms=self.config.alert_batch_window_ms
+            )
+        return self._alert_batcher
+    
+    @property
+    def _program_key(self) -> str:
+        """已编译程序的共享键"""
+        return self.config.specialization or self.config.agent_type
+    
+    def _compiled_path(self, name: str) -> Path:
+        """已编译程序的保存路径"""
+        return Path(self.config.compiled_dir) / self._program_key / f"{name}.json"
+    
+    def _get_module(self, name: str) -> dspy.Module:
+        """获取 DSPy 模块，优先复用已编译的程序"""
+        module = getattr(self, f"_{name}")
+        if module is not None:
+            return module
+        
+        key = (self._program_key, name)
+        module = _COMPILED_PROGRAMS.get(key)
+        if module is None:
+            module = _module_factory(name)()
+            path = self._compiled_path(name)
+            if path.exists():
+                module.load(str(path))
+                _COMPILED_PROGRAMS[key] = module
+        
+        setattr(self, f"_{name}", module)
+        return module
+    
+    def warm_up(self, training_sets: Dict[str, List[dspy.Example]],
+                metric: Optional[Any] = None,
+                max_bootstrapped_demos: int = 4) -> List[str]:
+        """使用 BootstrapFewShot 编译 DSPy 模块并保存
+        
+        Args:
+            training_sets: 模块名称到训练样例的映射
+            metric: 评估函数，为空时接受所有引导样例
+            max_bootstrapped_demos: 每个预测器最多引导的示例数
+            
+        Returns:
+            List[str]: 已编译的模块名称
+        """
+        from dspy.teleprompt import BootstrapFewShot
+        
+        compiled_names = []
+        for name, trainset in training_sets.items():
+            if name not in _DSPY_MODULE_FACTORIES:
+                raise ValueError(f"Unknown DSPy module: {name}")
+            if not trainset:
+                continue
+            
+            teleprompter = BootstrapFewShot(
+                metric=metric,
+                max_bootstrapped_demos=max_bootstrapped_demos
+            )
+            compiled = teleprompter.compile(_module_factory(name)(), trainset=trainset)
+            
+            path = self._compiled_path(name)
+            path.parent.mkdir(parents=True, exist_ok=True)
+            compiled.save(str(path))
+            
+            _COMPILED_PROGRAMS[(self._program_key, name)] = compiled
+            setattr(self, f"_{name}", compiled)
+            compiled_names.append(name)
+        
+        if compiled_names:
+            self._fused_stage = None
+            self._alert_result_cache.clear()
+            if self._alert_batcher is not None:
+                self._alert_batcher.analyzer = self.alert_analyzer
+        
+        return compiled_names
+    
     def _build_agent_graph(self) -> StateGraph:
         """构建智能体状态图"""
         # 创建状态图
@@ -217,21 +560,20 @@ class IntelligentOpsAgent:
                 if isinstance(incident, dict) and "alert_info" in incident:
                     historical_alerts.append(incident["alert_info"])
             
-            analysis_result = self.alert_analyzer.forward(
-                alert_info=alert_info,
-                historical_alerts=historical_alerts
-            )
+            if self.config.alert_batch_window_ms > 0 and not historical_alerts:
+                # 无历史关联时与并发到达的告警合并分析
+                analysis_result = await self.alert_batcher.submit(alert_info)
+            else:
+                analysis_result = await asyncio.to_thread(
+                    self.alert_analyzer.forward,
+                    alert_info=alert_info,
+                    historical_alerts=historical_alerts
+                )
             
             return {
                 **state,
                 "stage": "alert_processed",
-                "analysis_result": {
-                    "priority": analysis_result.priority,
-                    "category": analysis_result.category,
-                    "urgency_score": analysis_result.urgency_score,
-                    "root_cause_hints": analysis_result.root_cause_hints,
-                    "recommended_actions": analysis_result.recommended_actions
-                },
+                "analysis_result": _analysis_to_dict(analysis_result),
                 "last_update": datetime.now()
             }
             
@@ -245,21 +587,20 @@ class IntelligentOpsAgent:
     
     async def _diagnose_issue_node(self, state: AgentState) -> AgentState:
         """诊断问题节点"""
+        from ..dspy_modules.alert_analyzer import AlertAnalysisResult
+        from ..dspy_modules.diagnostic_agent import DiagnosticContext
+        
         try:
             symptoms = state.get("symptoms", [])
             context = state.get("context", {})
             
-            # 创建诊断上下文
-            from ..dspy_modules.diagnostic_agent import DiagnosticContext
-            from ..dspy_modules.alert_analyzer import AlertAnalysisResult
-            
-            # 创建模拟告警分析结果
-            alert_analysis = AlertAnalysisResult(
+            # 创建模拟告警分析结果（字段均由内部给定，跳过 pydantic 校验）
+            alert_analysis = AlertAnalysisResult.model_construct(
                 alert_id="diagnostic_request",
                 priority="medium",
                 category="investigation",
                 urgency_score=0.5,
-                root_cause_hints=symptoms,
+                root_cause_hints=list(symptoms),
                 recommended_actions=[]
             )
             
@@ -272,21 +613,14 @@ class IntelligentOpsAgent:
             )
             
             # 执行诊断
-            diagnostic_result = self.diagnostic_agent.forward(diagnostic_context)
+            diagnostic_result = await asyncio.to_thread(
+                self.diagnostic_agent.forward, diagnostic_context
+            )
             
             return {
                 **state,
                 "stage": "diagnosed",
-                "diagnostic_result": {
-                    "root_cause": diagnostic_result.root_cause,
-                    "confidence_score": diagnostic_result.confidence_score,
-                    "impact_assessment": diagnostic_result.impact_assessment,
-                    "affected_components": diagnostic_result.affected_components,
-                    "business_impact": diagnostic_result.business_impact,
-                    "recovery_estimate": diagnostic_result.recovery_time_estimate,
-                    "similar_incidents": diagnostic_result.similar_incidents,
-                    "evidence": diagnostic_result.evidence
-                },
+                "diagnostic_result": _diagnosis_to_dict(diagnostic_result),
                 "last_update": datetime.now()
             }
             
@@ -300,14 +634,14 @@ class IntelligentOpsAgent:
     
     async def _plan_actions_node(self, state: AgentState) -> AgentState:
         """规划行动节点"""
+        from ..dspy_modules.diagnostic_agent import DiagnosticResult
+        
         try:
             diagnostic_result = state.get("diagnostic_result")
             if not diagnostic_result:
                 raise ValueError("No diagnostic result available")
             
             # 转换诊断结果
-            from ..dspy_modules.diagnostic_agent import DiagnosticResult
-            
             diag_result = DiagnosticResult(
                 incident_id=diagnostic_result.get("incident_id", "plan_request"),
                 root_cause=diagnostic_result.get("root_cause", "Unknown"),
@@ -321,40 +655,14 @@ class IntelligentOpsAgent:
             )
             
             # 生成行动计划
-            action_plan = self.action_planner.forward(diag_result, state.get("context", {}))
+            action_plan = await asyncio.to_thread(
+                self.action_planner.forward, diag_result, state.get("context", {})
+            )
             
             return {
                 **state,
                 "stage": "planned",
-                "action_plan": {
-                    "plan_id": action_plan.plan_id,
-                    "priority": action_plan.priority,
-                    "estimated_duration": action_plan.estimated_duration,
-                    "risk_assessment": action_plan.risk_assessment,
-                    "approval_required": action_plan.approval_required,
-                    "steps": [
-                        {
-                            "step_id": step.step_id,
-                            "action_type": step.action_type,
-                            "description": step.description,
-                            "command": step.command,
-                            "timeout": step.timeout,
-                            "risk_level": step.risk_level
-                        }
-                        for step in action_plan.steps
-                    ],
-                    "rollback_plan": [
-                        {
-                            "step_id": step.step_id,
-                            "description": step.description,
-                            "command": step.command
-                        }
-                        for step in action_plan.rollback_plan
-                    ],
-                    "pre_checks": action_plan.pre_checks,
-                    "post_checks": action_plan.post_checks,
-                    "notifications": action_plan.notifications
-                },
+                "action_plan": _action_plan_to_dict(action_plan),
                 "last_update": datetime.now()
             }
             
@@ -378,39 +686,48 @@ class IntelligentOpsAgent:
                     **state,
                     "stage": "executed",
                     "execution_result": {
-                        "status": "manual_approval_required",
+                        "status": _STATUS_STR[TaskStatus.MANUAL_APPROVAL_REQUIRED],
                         "message": "Automatic execution is disabled. Manual approval required.",
                         "plan_id": action_plan.get("plan_id", "unknown")
                     },
                     "last_update": datetime.now()
                 }
             
-            # 模拟执行过程
+            # 按依赖关系分批，同一批次内的步骤并发执行
             executed_steps = []
             failed_steps = []
-            
-            for step in action_plan.get("steps", []):
-                try:
-                    # 模拟步骤执行
-                    await asyncio.sleep(0.1)  # 模拟执行时间
-                    executed_steps.append(step["step_id"])
-                except Exception as e:
-                    failed_steps.append({
-                        "step_id": step["step_id"],
-                        "error": str(e)
-                    })
-            
-            execution_status = "success" if not failed_steps else "partial" if executed_steps else "failed"
+            semaphore = asyncio.Semaphore(self.config.max_concurrent_steps)
+
+            for wave in self._partition_step_waves(action_plan.get("steps", [])):
+                results = await asyncio.gather(
+                    *(self._run_step(step, semaphore) for step in wave),
+                    return_exceptions=True
+                )
+                for step, result in zip(wave, results):
+                    if isinstance(result, Exception):
+                        failed_steps.append({
+                            "step_id": step["step_id"],
+                            "error": str(result)
+                        })
+                    else:
+                        executed_steps.append(step["step_id"])
+
+            if not failed_steps:
+                execution_status = TaskStatus.SUCCESS
+            elif executed_steps:
+                execution_status = TaskStatus.PARTIAL
+            else:
+                execution_status = TaskStatus.FAILED
             
             return {
                 **state,
                 "stage": "executed",
                 "execution_result": {
-                    "status": execution_status,
+                    "status": _STATUS_STR[execution_status],
                     "plan_id": action_plan.get("plan_id", "unknown"),
                     "executed_steps": executed_steps,
                     "failed_steps": failed_steps,
-                    "execution_time": datetime.now().isoformat()
+                    "execution_time": _ts()
                 },
                 "last_update": datetime.now()
             }
@@ -442,7 +759,7 @@ class IntelligentOpsAgent:
                 "incident_id": state.get("workflow_id", "unknown"),
                 "title": f"Agent {state['agent_id']} Task Report",
                 "summary": f"Completed task: {state.get('current_task', 'unknown')}",
-                "timestamp": datetime.now().isoformat(),
+                "timestamp": _ts(),
                 "agent_id": state["agent_id"],
                 "status": "generated",
                 "results": {
@@ -485,7 +802,7 @@ class IntelligentOpsAgent:
             updated_learning_data = {
                 **state.get("learning_data", {}),
                 **feedback,
-                "last_feedback_time": datetime.now().isoformat()
+                "last_feedback_time": _ts()
             }
             
             # 更新历史记录
@@ -493,7 +810,7 @@ class IntelligentOpsAgent:
             if state.get("report"):
                 updated_history.append({
                     "incident_id": state["workflow_id"],
-                    "timestamp": datetime.now().isoformat(),
+                    "timestamp": _ts(),
                     "task_type": state.get("current_task"),
                     "results": state.get("task_output", {})
                 })
@@ -521,7 +838,9 @@ class IntelligentOpsAgent:
             "status": "completed",
             "stage": "finalized",
             "task_output": {
-                "status": "success" if not state.get("errors") else "completed_with_errors",
+                "status": _STATUS_STR[
+                    TaskStatus.COMPLETED_WITH_ERRORS if state.get("errors") else TaskStatus.SUCCESS
+                ],
                 "task_type": state.get("current_task"),
                 "results": {
                     "analysis": state.get("analysis_result"),
@@ -531,7 +850,7 @@ class IntelligentOpsAgent:
                     "report": state.get("report")
                 },
                 "errors": state.get("errors", []),
-                "timestamp": datetime.now().isoformat()
+                "timestamp": _ts()
             },
             "last_update": datetime.now()
         }
@@ -556,10 +875,10 @@ class IntelligentOpsAgent:
                 "stage": "error_handling",
                 "status": "failed",
                 "task_output": {
-                    "status": "failed",
+                    "status": _STATUS_STR[TaskStatus.FAILED],
                     "errors": errors,
                     "retry_count": retry_count,
-                    "timestamp": datetime.now().isoformat()
+                    "timestamp": _ts()
                 },
                 "last_update": datetime.now()
             }
@@ -574,10 +893,7 @@ class IntelligentOpsAgent:
             return "error"
             
         # 根据任务类型路由
-        valid_tasks = ["process_alert", "diagnose_issue", "plan_actions", 
-                      "execute_actions", "generate_report", "learn_feedback"]
-        
-        if current_task in valid_tasks:
+        if current_task in _ROUTABLE_TASKS:
             return current_task
         else:
             return "error"
@@ -601,7 +917,8 @@ class IntelligentOpsAgent:
     
     # ==================== 公共接口 ====================
     
-    async def process_alert(self, alert: Union[AlertInfo, Dict[str, Any]]) -> Dict[str, Any]:
+    async def process_alert(self, alert: Union[AlertInfo, Dict[str, Any]],
+                            as_bytes: bool = False) -> Union[Dict[str, Any], bytes]:
         """处理告警"""
         # 转换告警格式
         if isinstance(alert, dict):
@@ -609,6 +926,20 @@ class IntelligentOpsAgent:
         else:
             alert_info = alert
         
+        # 重复投递的同一告警（alert_id 和内容都相同）直接返回缓存结果
+        # 缓存键只忽略 timestamp，不同告警不会拿到彼此的结果；命中的响应带 cached 标记，
+        # 单独计数，不计入事件日志。条目超过 alert_cache_ttl 失效，反馈学习或重新编译模块后整体清空
+        cache_key = fingerprint(alert_info.model_dump(exclude={"timestamp"}))
+        cached = self._alert_result_cache.get(cache_key)
+        if cached is not None:
+            expires_at, cached_result = cached
+            if time.monotonic() < expires_at:
+                result = copy.deepcopy(cached_result)
+                result["cached"] = True
+                result["timestamp"] = _ts()
+                self._alert_cache_hits += 1
+                return self._respond(result, as_bytes)
+        
         # 创建初始状态
         initial_state = self._create_initial_state(
             task="process_alert",
@@ -616,9 +947,57 @@ class IntelligentOpsAgent:
         )
         
         # 运行智能体图
-        return await self._run_agent_task(initial_state)
+        result = await self._run_agent_task(initial_state)
+        
+        # 只缓存成功的结果
+        if result.get("status") == _STATUS_STR[TaskStatus.SUCCESS]:
+            self._alert_result_cache.set(
+                cache_key, (time.monotonic() + self.config.alert_cache_ttl, copy.deepcopy(result))
+            )
+        
+        return self._respond(result, as_bytes)
+    
+    async def handle_alert(self, alert: Union[AlertInfo, Dict[str, Any]],
+                           context: Optional[Dict[str, Any]] = None,
+                           as_bytes: bool = False) -> Union[Dict[str, Any], bytes]:
+        """一次完成告警分析、诊断和行动规划（不经过智能体图）"""
+        if isinstance(alert, dict):
+            alert_info = AlertInfo(**alert)
+        else:
+            alert_info = alert
+        
+        self._running_tasks += 1
+        start_time = datetime.now()
+        try:
+            fused_result = await asyncio.to_thread(self.fused_stage.run, alert_info, context)
+            result = {
+                "status": _STATUS_STR[TaskStatus.SUCCESS],
+                "task_type": _TASK_TYPE_STR[TaskType.HANDLE_ALERT],
+                "results": fused_result.to_dict(),
+                "errors": [],
+                "timestamp": _ts()
+            }
+        except Exception as e:
+            result = {
+                "status": _STATUS_STR[TaskStatus.ERROR],
+                "error": str(e),
+                "timestamp": _ts()
+            }
+        finally:
+            self._running_tasks -= 1
+        
+        end_time = datetime.now()
+        self.incident_log.append(
+            timestamp=end_time,
+            resolution_seconds=(end_time - start_time).total_seconds(),
+            success=result["status"] == _STATUS_STR[TaskStatus.SUCCESS],
+            task_type=TaskType.HANDLE_ALERT
+        )
+        
+        return self._respond(result, as_bytes)
     
-    async def diagnose_issue(self, symptoms: List[str], context: Dict[str, Any]) -> Dict[str, Any]:
+    async def diagnose_issue(self, symptoms: List[str], context: Dict[str, Any],
+                             as_bytes: bool = False) -> Union[Dict[str, Any], bytes]:
         """诊断问题"""
         # 创建初始状态
         initial_state = self._create_initial_state(
@@ -628,10 +1007,11 @@ class IntelligentOpsAgent:
         )
         
         # 运行智能体图
-        return await self._run_agent_task(initial_state)
+        return self._respond(await self._run_agent_task(initial_state), as_bytes)
     
     async def plan_actions(self, diagnostic_result: Dict[str, Any], 
-                          system_context: Dict[str, Any]) -> Dict[str, Any]:
+                          system_context: Dict[str, Any],
+                          as_bytes: bool = False) -> Union[Dict[str, Any], bytes]:
         """规划行动"""
         # 创建初始状态
         initial_state = self._create_initial_state(
@@ -641,9 +1021,10 @@ class IntelligentOpsAgent:
         )
         
         # 运行智能体图
-        return await self._run_agent_task(initial_state)
+        return self._respond(await self._run_agent_task(initial_state), as_bytes)
     
-    async def execute_actions(self, action_plan: Dict[str, Any]) -> Dict[str, Any]:
+    async def execute_actions(self, action_plan: Dict[str, Any],
+                              as_bytes: bool = False) -> Union[Dict[str, Any], bytes]:
         """执行行动"""
         # 创建初始状态
         initial_state = self._create_initial_state(
@@ -652,9 +1033,10 @@ class IntelligentOpsAgent:
         )
         
         # 运行智能体图
-        return await self._run_agent_task(initial_state)
+        return self._respond(await self._run_agent_task(initial_state), as_bytes)
     
-    async def generate_report(self, incident_data: Dict[str, Any]) -> Dict[str, Any]:
+    async def generate_report(self, incident_data: Dict[str, Any],
+                              as_bytes: bool = False) -> Union[Dict[str, Any], bytes]:
         """生成报告"""
         # 创建初始状态
         initial_state = self._create_initial_state(
@@ -663,9 +1045,10 @@ class IntelligentOpsAgent:
         )
         
         # 运行智能体图
-        return await self._run_agent_task(initial_state)
+        return self._respond(await self._run_agent_task(initial_state), as_bytes)
     
-    async def learn_from_feedback(self, feedback: Dict[str, Any]) -> Dict[str, Any]:
+    async def learn_from_feedback(self, feedback: Dict[str, Any],
+                                  as_bytes: bool = False) -> Union[Dict[str, Any], bytes]:
         """从反馈中学习"""
         # 创建初始状态
         initial_state = self._create_initial_state(
@@ -674,7 +1057,12 @@ class IntelligentOpsAgent:
         )
         
         # 运行智能体图
-        return await self._run_agent_task(initial_state)
+        result = await self._run_agent_task(initial_state)
+        
+        # 学习数据已变化，此前缓存的告警处理结果不再可信
+        self._alert_result_cache.clear()
+        
+        return self._respond(result, as_bytes)
     
     # ==================== 辅助方法 ====================
     
@@ -711,8 +1099,46 @@ class IntelligentOpsAgent:
             workflow_id=workflow_id
         )
     
+    @staticmethod
+    def _respond(result: Dict[str, Any], as_bytes: bool) -> Union[Dict[str, Any], bytes]:
+        """按调用方需要返回字典或 JSON 字节串"""
+        return _serialize_response(result) if as_bytes else result
+    
+    @staticmethod
+    def _partition_step_waves(steps: List[Dict[str, Any]]) -> List[List[Dict[str, Any]]]:
+        """按依赖关系将步骤划分为可并发执行的批次"""
+        step_ids = {step["step_id"] for step in steps}
+        done: set = set()
+        pending = list(steps)
+        waves = []
+
+        while pending:
+            # 依赖已完成（或依赖不在本计划内）的步骤组成一个批次
+            wave = [
+                step for step in pending
+                if all(dep in done or dep not in step_ids
+                       for dep in step.get("dependencies") or [])
+            ]
+            if not wave:
+                # 存在循环依赖，剩余步骤作为最后一个批次执行
+                wave = pending
+            waves.append(wave)
+            done.update(step["step_id"] for step in wave)
+            pending = [step for step in pending if step["step_id"] not in done]
+
+        return waves
+
+    async def _run_step(self, step: Dict[str, Any], semaphore: asyncio.Semaphore) -> str:
+        """执行单个步骤"""
+        async with semaphore:
+            # 模拟步骤执行
+            await asyncio.sleep(0.1)  # 模拟执行时间
+            return step["step_id"]
+
     async def _run_agent_task(self, initial_state: AgentState) -> Dict[str, Any]:
         """运行智能体任务"""
+        self._running_tasks += 1
+        self.current_state = initial_state
         try:
             if not self.compiled_graph:
                 self.compile()
@@ -722,46 +1148,89 @@ class IntelligentOpsAgent:
                 initial_state,
                 config={"recursion_limit": self.config.max_retries * 5}
             )
+            self.current_state = final_state
             
             # 返回任务输出
-            return final_state.get("task_output", {
-                "status": "completed",
+            task_output = final_state.get("task_output") or {
+                "status": _STATUS_STR[TaskStatus.COMPLETED],
                 "results": final_state,
-                "timestamp": datetime.now().isoformat()
-            })
+                "timestamp": _ts()
+            }
+            
+            # 记录事件日志
+            self._record_incident(final_state, task_output)
+            
+            return task_output
             
         except Exception as e:
             return {
-                "status": "error",
+                "status": _STATUS_STR[TaskStatus.ERROR],
                 "error": str(e),
-                "timestamp": datetime.now().isoformat()
+                "timestamp": _ts()
             }
+        finally:
+            self._running_tasks -= 1
+    
+    def _record_incident(self, final_state: Dict[str, Any], task_output: Dict[str, Any]) -> None:
+        """记录已完成任务到事件日志"""
+        start_time = final_state.get("start_time")
+        end_time = final_state.get("last_update") or datetime.now()
+        resolution_seconds = (end_time - start_time).total_seconds() if start_time else 0.0
+        
+        self.incident_log.append(
+            timestamp=end_time,
+            resolution_seconds=resolution_seconds,
+            success=task_output.get("status") == _STATUS_STR[TaskStatus.SUCCESS],
+            task_type=_TASK_TYPE_BY_STR.get(final_state.get("current_task"), -1)
+        )
+    
+    def _calculate_avg_resolution_time(self) -> float:
+        """计算平均处理时间"""
+        return self.incident_log.avg_resolution_time()
+    
+    def _calculate_success_rate(self) -> float:
+        """计算成功率"""
+        return self.incident_log.success_rate()
     
     # ==================== 状态和指标 ====================
     
+    @property
+    def is_active(self) -> bool:
+        """是否有正在运行的任务"""
+        return self._running_tasks > 0
+    
     def get_agent_status(self) -> Dict[str, Any]:
-        """获取智能体状态"""
+        """获取智能体状态
+        
+        配置相关字段只构建一次，每次调用返回合并了动态字段的新字典
+        """
+        if self._status_cache is None:
+            self._status_cache = {
+                "agent_id": self.config.agent_id,
+                "agent_type": self.config.agent_type,
+                "specialization": self.config.specialization,
+                "learning_enabled": self.config.enable_learning,
+                "reporting_enabled": self.config.enable_reporting,
+                "auto_execution_enabled": self.config.auto_execution
+            }
+        
         return {
-            "agent_id": self.config.agent_id,
-            "agent_type": self.config.agent_type,
-            "specialization": self.config.specialization,
-            "status": "ready",
+            **self._status_cache,
+            "status": "processing" if self._running_tasks else "ready",
             "graph_compiled": self.compiled_graph is not None,
-            "learning_enabled": self.config.enable_learning,
-            "reporting_enabled": self.config.enable_reporting,
-            "auto_execution_enabled": self.config.auto_execution,
-            "last_update": datetime.now().isoformat()
+            "last_update": _ts()
         }
     
     def get_performance_metrics(self) -> Dict[str, Any]:
         """获取性能指标"""
         return {
             "agent_id": self.config.agent_id,
-            "incidents_processed": 0,  # 实际应该从状态中获取
-            "average_resolution_time": 300.0,  # 模拟值
-            "success_rate": 0.85,  # 模拟值
+            "incidents_processed": len(self.incident_log),
+            "average_resolution_time": self._calculate_avg_resolution_time(),
+            "success_rate": self._calculate_success_rate(),
+            "alert_cache_hits": self._alert_cache_hits,
             "learning_data_points": 0,  # 实际应该从状态中获取
-            "timestamp": datetime.now().isoformat()
+            "timestamp": _ts()
         }
 
 
@@ -794,15 +1263,20 @@ class AgentManager:
     
     def get_system_status(self) -> Dict[str, Any]:
         """获取系统状态"""
+        active_agents = 0
+        agent_list = []
+        for agent_id, agent in self.agents.items():
+            # 处理过任务（有当前状态）的智能体计为活跃
+            if agent.current_state:
+                active_agents += 1
+            agent_list.append({
+                "agent_id": agent_id,
+                "status": agent.get_agent_status()
+            })
+        
         return {
             "total_agents": len(self.agents),
-            "active_agents": len([a for a in self.agents.values() if a.current_state]),
-            "agent_list": [
-                {
-                    "agent_id": agent_id,
-                    "status": agent.get_agent_status()
-                }
-                for agent_id, agent in self.agents.items()
-            ],
-            "timestamp": datetime.now().isoformat()
+            "active_agents": active_agents,
+            "agent_list": agent_list,
+            "timestamp": _ts()
         }
\ No newline at end of file
@@ -1,8 +1,13 @@
 """
 智能体 LangGraph Studio 集成模块
 导出编译好的智能体图供 Studio 使用
+
+智能体实例和编译图在首次访问 `graph` / `agent` 时才创建，导入本模块不会触发
+LLM 初始化和图编译
 """
 
+from functools import cache
+
 from src.agents.intelligent_ops_agent import IntelligentOpsAgent, AgentConfig
 
 # 创建默认的智能体配置
@@ -15,14 +20,28 @@ default_config = AgentConfig(
     auto_execution=False
 )
 
-# 创建智能体实例
-_agent_instance = IntelligentOpsAgent(default_config)
 
-# 编译智能体图 - 这是 Studio 需要的主要对象
-graph = _agent_instance.compile()
+@cache
+def _agent_instance() -> IntelligentOpsAgent:
+    """创建智能体实例（进程内只创建一次）"""
+    return IntelligentOpsAgent(default_config)
+
+
+@cache
+def _graph():
+    """编译智能体图（进程内只编译一次）"""
+    return _agent_instance().compile()
+
+
+def __getattr__(name: str):
+    # 编译智能体图 - 这是 Studio 需要的主要对象
+    if name == "graph":
+        return _graph()
+    # 同时导出智能体实例供其他用途
+    if name == "agent":
+        return _agent_instance()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
-# 同时导出智能体实例供其他用途
-agent = _agent_instance
 
 # 导出供 LangGraph Studio 使用
-__all__ = ["graph", "agent"]
\ No newline at end of file
+__all__ = ["graph", "agent"]
@@ -1,11 +1,67 @@
-from .alert_analyzer import AlertAnalyzer
-from .diagnostic_agent import DiagnosticAgent
-from .action_planner import ActionPlanner
-from .report_generator import ReportGenerator
+import importlib
+
+# 按需导入子模块，避免导入包时加载全部 DSPy 模块
+_LAZY_EXPORTS = {
+    "AlertAnalyzer": ".alert_analyzer",
+    "DiagnosticAgent": ".diagnostic_agent",
+    "ActionPlanner": ".action_planner",
+    "ReportGenerator": ".report_generator",
+}
 
 __all__ = [
     "AlertAnalyzer",
     "DiagnosticAgent", 
     "ActionPlanner",
     "ReportGenerator"
-]
\ No newline at end of file
+]
+
+
+_litellm_configured = False
+
+
+def _configure_litellm_once() -> None:
+    """关闭 LiteLLM 的详细日志和调试输出（每个进程只执行一次）
+    
+    宿主应用注册的回调（如 Langfuse、成本统计）保持不变
+    """
+    global _litellm_configured
+    if _litellm_configured:
+        return
+    _litellm_configured = True
+    
+    import litellm
+    litellm.set_verbose = False
+    litellm.suppress_debug_info = True
+    litellm._logging._disable_debugging()
+
+
+# 预测器模板，按 (预测器类型, 签名) 缓存；模板本身不对外提供，只用于复制
+_PREDICTORS = {}
+
+
+def _shared_predictor(signature, predictor_cls=None):
+    """获取预测器实例（默认 ChainOfThought）
+    
+    签名解析和预测器构造的结果按 (预测器类型, 签名) 缓存，每次返回模板的
+    独立副本，示例等状态不在模块实例间共享，可直接 load 或就地编译
+    """
+    import dspy
+    predictor_cls = predictor_cls or dspy.ChainOfThought
+    key = (predictor_cls, signature)
+    template = _PREDICTORS.get(key)
+    if template is None:
+        template = _PREDICTORS.setdefault(key, predictor_cls(signature))
+    return template.reset_copy()
+
+
+def __getattr__(name):
+    module_name = _LAZY_EXPORTS.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module_name, __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
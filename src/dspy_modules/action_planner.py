@@ -1,8 +1,78 @@
+import asyncio
+import itertools
+import re
 import dspy
-from typing import Dict, List, Any, Optional
+from typing import AsyncIterator, Dict, Iterator, List, Any, Optional, Tuple
 from pydantic import BaseModel, Field
 from enum import Enum
 from .diagnostic_agent import DiagnosticResult
+from ..utils.parallel import run_in_parallel
+from ..utils.cache import cached_forward
+from ..utils.serialization import dumps
+from . import _configure_litellm_once, _shared_predictor
+
+
+
+# 描述关键字到命令的映射（按优先级排列）
+_CMD_TABLE = {
+    "restart": "systemctl restart service_name",
+    "scale": "kubectl scale deployment deployment_name --replicas=N",
+    "update": "kubectl apply -f config.yaml",
+}
+_ROLLBACK_TABLE = {
+    "restart": "systemctl stop service_name",
+    "scale": "kubectl scale deployment deployment_name --replicas=1",
+    "update": "kubectl rollout undo deployment/deployment_name",
+}
+
+# 两张命令表共用同一组关键字，编译为单个正则，一次扫描找出全部命中
+_ACTION_KEYWORD_RE = re.compile("|".join(map(re.escape, _CMD_TABLE)), re.IGNORECASE)
+_ACTION_KEYWORD_RANK = {keyword: rank for rank, keyword in enumerate(_CMD_TABLE)}
+
+# 根因关键字对应的额外预检查项
+_PRE_CHECK_KEYWORDS = (
+    ("database", "验证数据库连接"),
+    ("network", "检查网络连通性"),
+)
+_PRE_CHECK_RE = re.compile("|".join(re.escape(k) for k, _ in _PRE_CHECK_KEYWORDS), re.IGNORECASE)
+
+# 通用预检查/后检查项
+_BASE_PRE_CHECKS = ("验证系统备份完整性", "确认业务流量路由正常", "检查依赖服务状态")
+_BASE_POST_CHECKS = ("验证服务健康状态", "确认业务功能正常", "检查性能指标恢复")
+
+# 按命中的关键字组合预先生成完整的预检查列表
+_PRE_CHECKS_BY_HITS: Dict[frozenset, tuple] = {
+    frozenset(keyword for keyword, _ in combo): _BASE_PRE_CHECKS + tuple(check for _, check in combo)
+    for n in range(len(_PRE_CHECK_KEYWORDS) + 1)
+    for combo in itertools.combinations(_PRE_CHECK_KEYWORDS, n)
+}
+
+
+def _match_action_keyword(description: str) -> Optional[str]:
+    """返回描述中优先级最高的行动关键字"""
+    hits = {m.group().lower() for m in _ACTION_KEYWORD_RE.finditer(description)}
+    if not hits:
+        return None
+    return min(hits, key=_ACTION_KEYWORD_RANK.__getitem__)
+
+# 影响级别对应的通知范围
+_NOTIFICATIONS: Dict[str, tuple] = {
+    "critical": ("通知运维团队负责人", "通知业务负责人", "更新事件管理系统"),
+    "high": ("通知运维团队", "更新事件管理系统"),
+}
+_DEFAULT_NOTIFICATIONS = ("记录到运维日志",)
+
+
+def _numbered_lines(text: str, offset: int = 0) -> Iterator[Tuple[int, str]]:
+    """产出 (行号, 去除首尾空白的行)，跳过空行
+    
+    行号按原始行计数（空行也占用行号，从 offset + 1 开始），
+    使步骤编号与 LM 输出中的行位置一致，依赖关系引用的步骤 ID 保持稳定
+    """
+    for i, line in enumerate(text.split("\n"), offset + 1):
+        line = line.strip()
+        if line:
+            yield i, line
 
 
 class ActionType(str, Enum):
@@ -89,9 +159,10 @@ class ActionPlanner(dspy.Module):
     
     def __init__(self):
         super().__init__()
-        self.action_generator = dspy.ChainOfThought(ActionGeneration)
-        self.risk_assessor = dspy.ChainOfThought(RiskAssessment)
-        self.rollback_planner = dspy.ChainOfThought(RollbackPlanning)
+        _configure_litellm_once()
+        self.action_generator = _shared_predictor(ActionGeneration)
+        self.risk_assessor = _shared_predictor(RiskAssessment)
+        self.rollback_planner = _shared_predictor(RollbackPlanning)
         
     def forward(self, diagnostic_result: DiagnosticResult, system_context: Dict[str, Any]) -> ActionPlan:
         """
@@ -104,24 +175,27 @@ class ActionPlanner(dspy.Module):
         Returns:
             ActionPlan: 行动计划
         """
+        # 系统上下文只格式化一次，供三个预测器共用
+        context_text = self._format_system_context(system_context)
+        
         # 1. 生成行动步骤
         action_result = self.action_generator(
             root_cause=diagnostic_result.root_cause,
             impact_assessment=diagnostic_result.impact_assessment,
-            system_context=self._format_system_context(system_context)
-        )
-        
-        # 2. 风险评估
-        risk_result = self.risk_assessor(
-            action_plan=action_result.action_steps,
-            system_state=self._format_system_state(system_context),
-            business_context=diagnostic_result.business_impact
+            system_context=context_text
         )
         
-        # 3. 生成回滚计划
-        rollback_result = self.rollback_planner(
-            action_steps=action_result.action_steps,
-            current_state=self._format_system_state(system_context)
+        # 2-3. 风险评估和回滚计划只依赖行动步骤，并发执行
+        risk_result, rollback_result = run_in_parallel(
+            lambda: self.risk_assessor(
+                action_plan=action_result.action_steps,
+                system_state=context_text,
+                business_context=diagnostic_result.business_impact
+            ),
+            lambda: self.rollback_planner(
+                action_steps=action_result.action_steps,
+                current_state=context_text
+            )
         )
         
         # 4. 解析行动步骤
@@ -129,7 +203,8 @@ class ActionPlanner(dspy.Module):
         rollback_steps = self._parse_rollback_steps(rollback_result.rollback_steps)
         
         # 5. 生成完整行动计划
-        return ActionPlan(
+        # 各字段已由 DSPy 按签名类型解析或由内部生成，跳过 pydantic 校验
+        return ActionPlan.model_construct(
             plan_id=f"plan_{diagnostic_result.incident_id}",
             incident_id=diagnostic_result.incident_id,
             priority=diagnostic_result.impact_assessment,
@@ -145,77 +220,145 @@ class ActionPlanner(dspy.Module):
     
     def _format_system_context(self, context: Dict[str, Any]) -> str:
         """格式化系统上下文"""
-        formatted = []
-        for key, value in context.items():
-            formatted.append(f"{key}: {value}")
-        return "; ".join(formatted)
-    
-    def _format_system_state(self, context: Dict[str, Any]) -> str:
-        """格式化系统状态"""
-        return self._format_system_context(context)
+        return "; ".join(f"{key}: {value}" for key, value in context.items())
     
-    def _parse_action_steps(self, steps_text: str) -> List[ActionStep]:
-        """解析行动步骤"""
-        steps = []
-        lines = steps_text.split('\n')
+    async def plan_many(self, requests: List[Tuple[DiagnosticResult, Dict[str, Any]]]) -> List[ActionPlan]:
+        """
+        并发生成多个行动计划
         
-        for i, line in enumerate(lines):
-            if line.strip():
-                step = ActionStep(
-                    step_id=f"step_{i+1}",
-                    action_type=ActionType.INVESTIGATION,  # 默认类型
-                    description=line.strip(),
-                    command=self._generate_command(line.strip()),
-                    parameters={},
-                    timeout=300,
-                    risk_level="medium"
-                )
-                steps.append(step)
+        每次规划在工作线程中运行，并发上限由
+        dspy.settings.configure(async_max_workers=N) 控制
         
-        return steps
+        Args:
+            requests: (诊断结果, 系统上下文) 列表
+            
+        Returns:
+            List[ActionPlan]: 与输入顺序一致的行动计划
+        """
+        plan = dspy.asyncify(self)
+        return await asyncio.gather(
+            *(plan(diagnostic_result, system_context) for diagnostic_result, system_context in requests)
+        )
     
-    def _parse_rollback_steps(self, rollback_text: str) -> List[ActionStep]:
-        """解析回滚步骤"""
-        steps = []
-        lines = rollback_text.split('\n')
+    def plan_batch(self, requests: List[Tuple[DiagnosticResult, Dict[str, Any]]],
+                   num_threads: int = 8) -> List[Optional[ActionPlan]]:
+        """
+        批量生成行动计划（dspy 并行批处理），失败的条目返回 None
         
-        for i, line in enumerate(lines):
-            if line.strip():
-                step = ActionStep(
-                    step_id=f"rollback_{i+1}",
-                    action_type=ActionType.ROLLBACK,
-                    description=line.strip(),
-                    command=self._generate_rollback_command(line.strip()),
-                    parameters={},
-                    timeout=300,
-                    risk_level="low"
-                )
-                steps.append(step)
+        Args:
+            requests: (诊断结果, 系统上下文) 列表
+            num_threads: 并行线程数
+            
+        Returns:
+            List[Optional[ActionPlan]]: 与输入顺序一致的行动计划
+        """
+        examples = [
+            dspy.Example(diagnostic_result=diagnostic_result, system_context=system_context)
+            .with_inputs("diagnostic_result", "system_context")
+            for diagnostic_result, system_context in requests
+        ]
+        return self.batch(
+            examples, num_threads=num_threads, max_errors=len(examples) + 1, disable_progress_bar=True
+        )
+    
+    async def astream_action_steps(self, diagnostic_result: DiagnosticResult,
+                                   system_context: Dict[str, Any]) -> AsyncIterator[ActionStep]:
+        """
+        流式生成行动步骤，每收到一整行即解析并产出一个步骤
+        
+        Args:
+            diagnostic_result: 诊断结果
+            system_context: 系统上下文
+            
+        Yields:
+            ActionStep: 行动步骤
+        """
+        stream = dspy.streamify(
+            self.action_generator,
+            stream_listeners=[dspy.streaming.StreamListener(signature_field_name="action_steps")]
+        )
         
-        return steps
+        buffer = ""
+        line_count = 0
+        streamed = False
+        async for chunk in stream(
+            root_cause=diagnostic_result.root_cause,
+            impact_assessment=diagnostic_result.impact_assessment,
+            system_context=self._format_system_context(system_context)
+        ):
+            if isinstance(chunk, dspy.streaming.StreamResponse):
+                streamed = True
+                buffer += chunk.chunk
+                # 只解析已完整到达的行，步骤编号沿用原始行号
+                complete, newline, buffer = buffer.rpartition("\n")
+                if newline:
+                    for index, description in _numbered_lines(complete, line_count):
+                        yield self._build_action_step(index, description)
+                    line_count += complete.count("\n") + 1
+            elif isinstance(chunk, dspy.Prediction):
+                # 未流式返回（如命中缓存）时解析完整输出，否则解析剩余部分
+                remaining = buffer if streamed else chunk.action_steps
+                for index, description in _numbered_lines(remaining, line_count):
+                    yield self._build_action_step(index, description)
+    
+    def _build_action_step(self, index: int, description: str) -> ActionStep:
+        """构建行动步骤（字段均由内部生成，跳过 pydantic 校验）"""
+        return ActionStep.model_construct(
+            step_id=f"step_{index}",
+            action_type=ActionType.INVESTIGATION,  # 默认类型
+            description=description,
+            command=self._generate_command(description),
+            parameters={},
+            timeout=300,
+            risk_level="medium"
+        )
+    
+    def _parse_action_steps(self, steps_text: str) -> List[ActionStep]:
+        """解析行动步骤（字段均由内部生成，跳过 pydantic 校验）"""
+        # 循环外绑定局部变量，避免逐行查找属性
+        construct = ActionStep.model_construct
+        generate_command = self._generate_command
+        inv = ActionType.INVESTIGATION  # 默认类型
+        return [
+            construct(
+                step_id=f"step_{i}",
+                action_type=inv,
+                description=desc,
+                command=generate_command(desc),
+                parameters={},
+                timeout=300,
+                risk_level="medium"
+            )
+            for i, desc in _numbered_lines(steps_text)
+        ]
+    
+    def _parse_rollback_steps(self, rollback_text: str) -> List[ActionStep]:
+        """解析回滚步骤（字段均由内部生成，跳过 pydantic 校验）"""
+        construct = ActionStep.model_construct
+        generate_command = self._generate_rollback_command
+        rb = ActionType.ROLLBACK
+        return [
+            construct(
+                step_id=f"rollback_{i}",
+                action_type=rb,
+                description=desc,
+                command=generate_command(desc),
+                parameters={},
+                timeout=300,
+                risk_level="low"
+            )
+            for i, desc in _numbered_lines(rollback_text)
+        ]
     
     def _generate_command(self, description: str) -> str:
         """根据描述生成命令"""
-        # 简单的命令生成逻辑
-        if "restart" in description.lower():
-            return "systemctl restart service_name"
-        elif "scale" in description.lower():
-            return "kubectl scale deployment deployment_name --replicas=N"
-        elif "update" in description.lower():
-            return "kubectl apply -f config.yaml"
-        else:
-            return "echo 'Manual action required'"
+        keyword = _match_action_keyword(description)
+        return _CMD_TABLE[keyword] if keyword else "echo 'Manual action required'"
     
     def _generate_rollback_command(self, description: str) -> str:
         """生成回滚命令"""
-        if "restart" in description.lower():
-            return "systemctl stop service_name"
-        elif "scale" in description.lower():
-            return "kubectl scale deployment deployment_name --replicas=1"
-        elif "update" in description.lower():
-            return "kubectl rollout undo deployment/deployment_name"
-        else:
-            return "echo 'Manual rollback required'"
+        keyword = _match_action_keyword(description)
+        return _ROLLBACK_TABLE[keyword] if keyword else "echo 'Manual rollback required'"
     
     def _requires_approval(self, risk_score: float) -> bool:
         """判断是否需要审批"""
@@ -223,54 +366,26 @@ class ActionPlanner(dspy.Module):
     
     def _generate_pre_checks(self, diagnostic_result: DiagnosticResult) -> List[str]:
         """生成预检查项"""
-        checks = [
-            "验证系统备份完整性",
-            "确认业务流量路由正常",
-            "检查依赖服务状态"
-        ]
-        
         # 基于诊断结果添加特定检查
-        if "database" in diagnostic_result.root_cause.lower():
-            checks.append("验证数据库连接")
-        if "network" in diagnostic_result.root_cause.lower():
-            checks.append("检查网络连通性")
-        
-        return checks
+        hits = frozenset(m.group().lower() for m in _PRE_CHECK_RE.finditer(diagnostic_result.root_cause))
+        return list(_PRE_CHECKS_BY_HITS[hits])
     
     def _generate_post_checks(self, diagnostic_result: DiagnosticResult) -> List[str]:
         """生成后检查项"""
-        checks = [
-            "验证服务健康状态",
-            "确认业务功能正常",
-            "检查性能指标恢复"
-        ]
+        checks = list(_BASE_POST_CHECKS)
         
-        # 基于受影响组件添加特定检查
-        for component in diagnostic_result.affected_components:
-            checks.append(f"验证{component}组件状态")
+        # 基于受影响组件添加特定检查（LM 输出的组件可能重复，按首次出现顺序去重）
+        checks.extend(f"验证{component}组件状态" for component in dict.fromkeys(diagnostic_result.affected_components))
         
         return checks
     
     def _generate_notifications(self, diagnostic_result: DiagnosticResult) -> List[str]:
         """生成通知列表"""
-        notifications = []
-        
         # 基于影响级别确定通知范围
-        if diagnostic_result.impact_assessment == "critical":
-            notifications.extend([
-                "通知运维团队负责人",
-                "通知业务负责人",
-                "更新事件管理系统"
-            ])
-        elif diagnostic_result.impact_assessment == "high":
-            notifications.extend([
-                "通知运维团队",
-                "更新事件管理系统"
-            ])
-        else:
-            notifications.append("记录到运维日志")
-        
-        return notifications
+        return list(_NOTIFICATIONS.get(diagnostic_result.impact_assessment, _DEFAULT_NOTIFICATIONS))
+
+
+_VALIDATION_SIGNATURE = "action_plan, system_constraints -> is_valid: bool, validation_errors: list[str]"
 
 
 class ActionValidator(dspy.Module):
@@ -278,11 +393,9 @@ class ActionValidator(dspy.Module):
     
     def __init__(self):
         super().__init__()
-        self.validation_signature = dspy.Signature(
-            "action_plan, system_constraints -> is_valid: bool, validation_errors: str"
-        )
-        self.validator = dspy.ChainOfThought(self.validation_signature)
+        self.validator = _shared_predictor(_VALIDATION_SIGNATURE, dspy.Predict)
     
+    @cached_forward()
     def forward(self, action_plan: ActionPlan, system_constraints: Dict[str, Any]) -> Dict[str, Any]:
         """
         验证行动计划
@@ -295,26 +408,27 @@ class ActionValidator(dspy.Module):
             Dict: 验证结果
         """
         result = self.validator(
-            action_plan=str(action_plan),
-            system_constraints=str(system_constraints)
+            action_plan=action_plan.model_dump_json(),
+            system_constraints=dumps(system_constraints, sort_keys=True)
         )
         
         return {
             "is_valid": result.is_valid,
-            "validation_errors": result.validation_errors.split(',') if result.validation_errors else []
+            "validation_errors": result.validation_errors or []
         }
 
 
+_OPTIMIZATION_SIGNATURE = "action_plan, performance_data -> optimized_plan: str, improvements: str"
+
+
 class ActionOptimizer(dspy.Module):
     """行动优化器"""
     
     def __init__(self):
         super().__init__()
-        self.optimization_signature = dspy.Signature(
-            "action_plan, performance_data -> optimized_plan: str, improvements: str"
-        )
-        self.optimizer = dspy.ChainOfThought(self.optimization_signature)
+        self.optimizer = _shared_predictor(_OPTIMIZATION_SIGNATURE)
     
+    @cached_forward()
     def forward(self, action_plan: ActionPlan, performance_data: Dict[str, Any]) -> ActionPlan:
         """
         优化行动计划
@@ -327,8 +441,8 @@ class ActionOptimizer(dspy.Module):
             ActionPlan: 优化后的行动计划
         """
         result = self.optimizer(
-            action_plan=str(action_plan),
-            performance_data=str(performance_data)
+            action_plan=action_plan.model_dump_json(),
+            performance_data=dumps(performance_data, sort_keys=True)
         )
         
         # 这里应该解析优化结果并更新行动计划
@@ -1,17 +1,40 @@
+import re
+import sys
 import dspy
-from typing import Dict, List, Any
+from typing import Dict, Iterable, List, Any, Optional, Sequence
 from pydantic import BaseModel, Field
+from ..utils.cache import cached_forward
+from ..utils.parallel import run_in_parallel
+from ..utils.sequences import tail
+from . import _configure_litellm_once, _shared_predictor
+from .models import AlertInfo
 
 
-class AlertInfo(BaseModel):
-    """告警信息模型"""
-    alert_id: str
-    timestamp: str
-    severity: str
-    source: str
-    message: str
-    metrics: Dict[str, Any] = Field(default_factory=dict)
-    tags: List[str] = Field(default_factory=list)
+# 各告警分类的通用处理建议
+_CATEGORY_ACTIONS: Dict[str, tuple] = {
+    "cpu": ("检查CPU使用率最高的进程", "验证系统负载是否异常"),
+    "memory": ("检查内存使用情况", "查找可能的内存泄漏"),
+    "network": ("检查网络连接状态", "验证网络配置"),
+    "disk": ("检查磁盘空间使用情况", "查看磁盘I/O性能"),
+    "application": ("检查应用程序日志", "验证应用程序配置"),
+}
+# 严重告警优先执行的紧急处理
+_CRITICAL_ACTIONS = ("立即通知相关运维人员", "启动紧急响应流程")
+
+# 标准优先级/分类标签（驻留字符串）
+_CANONICAL_LABELS: Dict[str, str] = {
+    label: sys.intern(label)
+    for label in ("critical", "high", "medium", "low", *_CATEGORY_ACTIONS)
+}
+
+# 告警过滤的默认规则
+_DEFAULT_ALLOW_SEVERITIES = frozenset({"critical", "high", "medium"})
+_DEFAULT_NOISE_PATTERN = r"heartbeat|keepalive|scrape_timeout|test_alert"
+
+
+def _canonical_label(value: str) -> str:
+    """将 LM 输出的标签规范化为驻留的标准字符串，未知标签原样返回"""
+    return _CANONICAL_LABELS.get(value.strip().lower(), value) if value else value
 
 
 class AlertAnalysisResult(BaseModel):
@@ -41,7 +64,7 @@ class AlertCorrelation(dspy.Signature):
     current_alert: str = dspy.InputField(desc="当前告警信息")
     historical_alerts: str = dspy.InputField(desc="历史告警信息")
     
-    related_alerts: str = dspy.OutputField(desc="相关告警ID列表，用逗号分隔")
+    related_alerts: List[str] = dspy.OutputField(desc="相关告警ID列表")
     correlation_reason: str = dspy.OutputField(desc="关联原因分析")
 
 
@@ -50,10 +73,19 @@ class RootCauseHints(dspy.Signature):
     alert_info: str = dspy.InputField(desc="告警详细信息")
     system_context: str = dspy.InputField(desc="系统上下文信息")
     
-    root_cause_hints: str = dspy.OutputField(desc="可能的根因提示列表")
+    root_cause_hints: List[str] = dspy.OutputField(desc="可能的根因提示列表")
     confidence_score: float = dspy.OutputField(desc="置信度评分 0-1")
 
 
+class BatchAlertAnalysis(dspy.Signature):
+    """批量告警分析签名"""
+    alerts: str = dspy.InputField(desc="多条告警信息，每行一条，包含告警ID")
+    
+    analyses: List[AlertAnalysisResult] = dspy.OutputField(
+        desc="每条告警的分析结果，alert_id 与输入一一对应"
+    )
+
+
 class AlertAnalyzer(dspy.Module):
     """告警分析模块
     
@@ -66,9 +98,11 @@ class AlertAnalyzer(dspy.Module):
     
     def __init__(self):
         super().__init__()
-        self.classify_alert = dspy.ChainOfThought(AlertClassification)
-        self.correlate_alerts = dspy.ChainOfThought(AlertCorrelation)
-        self.generate_hints = dspy.ChainOfThought(RootCauseHints)
+        _configure_litellm_once()
+        self.classify_alert = _shared_predictor(AlertClassification)
+        self.correlate_alerts = _shared_predictor(AlertCorrelation)
+        self.generate_hints = _shared_predictor(RootCauseHints)
+        self.analyze_alerts = _shared_predictor(BatchAlertAnalysis, dspy.Predict)
         
     def forward(self, alert_info: AlertInfo, historical_alerts: List[AlertInfo] = None) -> AlertAnalysisResult:
         """
@@ -76,118 +110,248 @@ class AlertAnalyzer(dspy.Module):
         
         Args:
             alert_info: 当前告警信息
-            historical_alerts: 历史告警信息列表
+            historical_alerts: 历史告警信息，可传入 list 或有界 deque，只使用最近10条
             
         Returns:
             AlertAnalysisResult: 分析结果
         """
-        # 1. 告警分类和优先级评估
-        classification = self.classify_alert(
-            alert_message=alert_info.message,
-            severity=alert_info.severity,
-            source=alert_info.source
-        )
-        
-        # 2. 告警关联分析
-        related_alerts = []
+        # 1-3. 告警分类、根因提示生成和告警关联分析相互独立，并发执行
+        formatted_alert = self._format_alert_info(alert_info)
+        calls = [
+            lambda: self.classify_alert(
+                alert_message=alert_info.message,
+                severity=alert_info.severity,
+                source=alert_info.source
+            ),
+            lambda: self.generate_hints(
+                alert_info=formatted_alert,
+                system_context=self._build_system_context(alert_info)
+            )
+        ]
         if historical_alerts:
             historical_info = self._format_historical_alerts(historical_alerts)
-            correlation = self.correlate_alerts(
-                current_alert=self._format_alert_info(alert_info),
+            calls.append(lambda: self.correlate_alerts(
+                current_alert=formatted_alert,
                 historical_alerts=historical_info
-            )
-            related_alerts = correlation.related_alerts.split(',') if correlation.related_alerts else []
-        
-        # 3. 根因提示生成
-        system_context = self._build_system_context(alert_info)
-        hints = self.generate_hints(
-            alert_info=self._format_alert_info(alert_info),
-            system_context=system_context
-        )
+            ))
         
-        # 4. 生成推荐行动
-        recommended_actions = self._generate_recommended_actions(
-            category=classification.category,
-            priority=classification.priority,
-            hints=hints.root_cause_hints
-        )
+        classification, hints, *correlation = run_in_parallel(*calls)
         
-        return AlertAnalysisResult(
+        return self._build_result(alert_info, classification, hints, correlation)
+    
+    def _build_result(self, alert_info: AlertInfo, classification: dspy.Prediction,
+                      hints: dspy.Prediction, correlation: List[dspy.Prediction]) -> AlertAnalysisResult:
+        """由各预测器输出组装分析结果"""
+        related_alerts = (correlation[0].related_alerts or []) if correlation else []
+        return self._assemble_result(
             alert_id=alert_info.alert_id,
             priority=classification.priority,
             category=classification.category,
             urgency_score=classification.urgency_score,
             related_alerts=related_alerts,
-            root_cause_hints=hints.root_cause_hints.split(',') if hints.root_cause_hints else [],
+            root_cause_hints=hints.root_cause_hints
+        )
+    
+    def _assemble_result(self, alert_id: str, priority: str, category: str, urgency_score: float,
+                         related_alerts: List[str], root_cause_hints: List[str]) -> AlertAnalysisResult:
+        """规范化标签并按分类生成推荐行动，单条与批量分析共用"""
+        # 规范化后下游的比较和查表可走字符串身份比较的快路径
+        priority = _canonical_label(priority)
+        category = _canonical_label(category)
+        
+        # 生成推荐行动
+        recommended_actions = self._generate_recommended_actions(
+            category=category,
+            priority=priority,
+            hints=root_cause_hints
+        )
+        
+        # 各字段已由 DSPy 按签名类型解析，跳过 pydantic 校验
+        return AlertAnalysisResult.model_construct(
+            alert_id=alert_id,
+            priority=priority,
+            category=category,
+            urgency_score=urgency_score,
+            related_alerts=related_alerts or [],
+            root_cause_hints=root_cause_hints or [],
             recommended_actions=recommended_actions
         )
     
-    def _format_alert_info(self, alert_info: AlertInfo) -> str:
-        """格式化告警信息"""
-        return f"""
-        Alert ID: {alert_info.alert_id}
-        Timestamp: {alert_info.timestamp}
-        Severity: {alert_info.severity}
-        Source: {alert_info.source}
-        Message: {alert_info.message}
-        Metrics: {alert_info.metrics}
-        Tags: {alert_info.tags}
+    def analyze_batch(self, alerts: List[AlertInfo]) -> List[AlertAnalysisResult]:
+        """
+        在一次 LLM 调用中分析多条告警
+        
+        批量输出与单条分析走相同的标签规范化和推荐行动生成。结果按批内位置
+        对应输入（同一批次中可能有重复的告警ID），某个位置缺失或告警ID
+        对不上时，该位置的告警单独分析
+        
+        Args:
+            alerts: 告警信息列表
+            
+        Returns:
+            List[AlertAnalysisResult]: 与输入顺序一致的分析结果
+        """
+        if not alerts:
+            return []
+        if len(alerts) == 1:
+            return [self.forward(alerts[0])]
+        
+        try:
+            batch = self.analyze_alerts(
+                alerts="\n".join(
+                    f"ID: {alert.alert_id}, Severity: {alert.severity}, "
+                    f"Source: {alert.source}, Message: {alert.message}, Metrics: {alert.metrics}"
+                    for alert in alerts
+                )
+            )
+            analyses = list(batch.analyses or [])
+        except Exception:
+            # 批量结果无法解析时逐条分析
+            analyses = []
+        
+        results: List[Optional[AlertAnalysisResult]] = [None] * len(alerts)
+        for i, (alert, analysis) in enumerate(zip(alerts, analyses)):
+            if analysis is None or analysis.alert_id != alert.alert_id:
+                continue
+            results[i] = self._assemble_result(
+                alert_id=alert.alert_id,
+                priority=analysis.priority,
+                category=analysis.category,
+                urgency_score=analysis.urgency_score,
+                related_alerts=analysis.related_alerts,
+                root_cause_hints=analysis.root_cause_hints
+            )
+        
+        # 批量结果中缺失的位置通过 batch_forward 补充分析
+        missing = [i for i, result in enumerate(results) if result is None]
+        if missing:
+            fallback = self.batch_forward([alerts[i] for i in missing])
+            for i, analysis in zip(missing, fallback):
+                results[i] = analysis
+        
+        return results
+    
+    def batch_forward(self, alerts: List[AlertInfo], historical_alerts: List[AlertInfo] = None,
+                      num_threads: int = 8) -> List[AlertAnalysisResult]:
+        """
+        批量分析告警，所有预测器调用在一次并行批处理中完成
+        
+        Args:
+            alerts: 告警信息列表
+            historical_alerts: 历史告警信息列表（所有告警共用）
+            num_threads: 并行线程数
+            
+        Returns:
+            List[AlertAnalysisResult]: 与输入顺序一致的分析结果
         """
+        if not alerts:
+            return []
+        
+        # 按来源排序，相同来源的提示词前缀相邻，便于命中前缀缓存
+        order = sorted(range(len(alerts)), key=lambda i: alerts[i].source)
+        historical_info = self._format_historical_alerts(historical_alerts) if historical_alerts else None
+        
+        exec_pairs = []
+        for i in order:
+            alert_info = alerts[i]
+            formatted_alert = self._format_alert_info(alert_info)
+            exec_pairs.append((self.classify_alert, {
+                "alert_message": alert_info.message,
+                "severity": alert_info.severity,
+                "source": alert_info.source
+            }))
+            exec_pairs.append((self.generate_hints, {
+                "alert_info": formatted_alert,
+                "system_context": self._build_system_context(alert_info)
+            }))
+            if historical_info:
+                exec_pairs.append((self.correlate_alerts, {
+                    "current_alert": formatted_alert,
+                    "historical_alerts": historical_info
+                }))
+        
+        outputs = dspy.Parallel(
+            num_threads=num_threads,
+            max_errors=len(exec_pairs) + 1,
+            disable_progress_bar=True
+        ).forward(exec_pairs)
+        
+        stride = 3 if historical_info else 2
+        results: List[Optional[AlertAnalysisResult]] = [None] * len(alerts)
+        for position, i in enumerate(order):
+            classification, hints, *correlation = outputs[position * stride:(position + 1) * stride]
+            if classification is None or hints is None or (correlation and correlation[0] is None):
+                # 批处理中失败的告警单独重试
+                results[i] = self.forward(alerts[i], historical_alerts)
+                continue
+            results[i] = self._build_result(alerts[i], classification, hints, correlation)
+        
+        return results
+    
+    def _format_alert_info(self, alert_info: AlertInfo) -> str:
+        """格式化告警信息（稳定字段在前，易变字段在后，以便命中提示词前缀缓存）"""
+        return "\n".join((
+            f"Source: {alert_info.source}",
+            f"Severity: {alert_info.severity}",
+            f"Tags: {alert_info.tags}",
+            f"Alert ID: {alert_info.alert_id}",
+            f"Timestamp: {alert_info.timestamp}",
+            f"Metrics: {alert_info.metrics}",
+            f"Message: {alert_info.message}"
+        ))
     
-    def _format_historical_alerts(self, alerts: List[AlertInfo]) -> str:
+    def _format_historical_alerts(self, alerts: Sequence[AlertInfo]) -> str:
         """格式化历史告警信息"""
-        formatted = []
-        for alert in alerts[-10:]:  # 只取最近10条
-            formatted.append(f"ID: {alert.alert_id}, Time: {alert.timestamp}, Message: {alert.message}")
-        return "; ".join(formatted)
+        if not alerts:
+            return ""
+        return "; ".join(
+            f"ID: {alert.alert_id}, Time: {alert.timestamp}, Message: {alert.message}"
+            for alert in tail(alerts, 10)  # 只取最近10条
+        )
     
     def _build_system_context(self, alert_info: AlertInfo) -> str:
         """构建系统上下文"""
-        return f"""
-        System: {alert_info.source}
-        Current metrics: {alert_info.metrics}
-        Environment tags: {alert_info.tags}
-        """
+        return "\n".join((
+            f"System: {alert_info.source}",
+            f"Environment tags: {alert_info.tags}",
+            f"Current metrics: {alert_info.metrics}"
+        ))
     
-    def _generate_recommended_actions(self, category: str, priority: str, hints: str) -> List[str]:
+    def _generate_recommended_actions(self, category: str, priority: str, hints: List[str]) -> List[str]:
         """生成推荐行动"""
-        actions = []
-        
         # 基于分类的通用建议
-        if category == "cpu":
-            actions.append("检查CPU使用率最高的进程")
-            actions.append("验证系统负载是否异常")
-        elif category == "memory":
-            actions.append("检查内存使用情况")
-            actions.append("查找可能的内存泄漏")
-        elif category == "network":
-            actions.append("检查网络连接状态")
-            actions.append("验证网络配置")
-        elif category == "disk":
-            actions.append("检查磁盘空间使用情况")
-            actions.append("查看磁盘I/O性能")
-        elif category == "application":
-            actions.append("检查应用程序日志")
-            actions.append("验证应用程序配置")
+        actions = list(_CATEGORY_ACTIONS.get(category, ()))
         
         # 基于优先级的紧急处理
         if priority == "critical":
-            actions.insert(0, "立即通知相关运维人员")
-            actions.insert(1, "启动紧急响应流程")
+            actions[:0] = _CRITICAL_ACTIONS
         
         return actions
 
 
+_FILTER_SIGNATURE = "alert_message, severity, source -> should_process: bool, filter_reason: str"
+
+
 class AlertFilter(dspy.Module):
-    """告警过滤模块"""
+    """告警过滤模块
     
-    def __init__(self):
+    先用确定性规则（严重程度白名单、来源黑名单、噪声模式）处理，
+    只有规则无法判断的告警才调用 LM
+    """
+    
+    def __init__(self, allow_severities: Optional[Iterable[str]] = None,
+                 blocked_sources: Optional[Iterable[str]] = None,
+                 noise_pattern: str = _DEFAULT_NOISE_PATTERN):
         super().__init__()
-        self.filter_signature = dspy.Signature(
-            "alert_message, severity, source -> should_process: bool, filter_reason: str"
+        self._allow_severities = (
+            frozenset(s.lower() for s in allow_severities)
+            if allow_severities is not None else _DEFAULT_ALLOW_SEVERITIES
         )
-        self.filter_predictor = dspy.ChainOfThought(self.filter_signature)
+        self._blocked_sources = frozenset(blocked_sources or ())
+        self._noise_re = re.compile(noise_pattern, re.I) if noise_pattern else None
+        self.filter_predictor = _shared_predictor(_FILTER_SIGNATURE, dspy.Predict)
     
+    @cached_forward(key=lambda alert_info: (alert_info.message, alert_info.severity, alert_info.source))
     def forward(self, alert_info: AlertInfo) -> bool:
         """
         过滤告警信息
@@ -198,6 +362,16 @@ class AlertFilter(dspy.Module):
         Returns:
             bool: 是否应该处理此告警
         """
+        severity = alert_info.severity.lower()
+        if severity not in self._allow_severities:
+            return False
+        if alert_info.source in self._blocked_sources:
+            return False
+        if self._noise_re is not None and self._noise_re.search(alert_info.message):
+            return False
+        if severity == "critical":
+            return True
+        
         result = self.filter_predictor(
             alert_message=alert_info.message,
             severity=alert_info.severity,
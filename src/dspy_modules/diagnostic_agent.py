@@ -1,15 +1,20 @@
+import asyncio
 import dspy
-from typing import Dict, List, Any, Optional
+from typing import Deque, Dict, List, Any, Optional, Union
 from pydantic import BaseModel, Field
 from .alert_analyzer import AlertAnalysisResult
+from ..utils.sequences import tail
+from ..utils.serialization import dumps
+from . import _configure_litellm_once, _shared_predictor
 
 
 class DiagnosticContext(BaseModel):
     """诊断上下文模型"""
     alert_analysis: AlertAnalysisResult
     system_metrics: Dict[str, Any] = Field(default_factory=dict)
-    log_entries: List[str] = Field(default_factory=list)
-    historical_incidents: List[Dict[str, Any]] = Field(default_factory=list)
+    # 可直接传入有界 deque（maxlen）以限制内存
+    log_entries: Union[List[str], Deque[str]] = Field(default_factory=list)
+    historical_incidents: Union[List[Dict[str, Any]], Deque[Dict[str, Any]]] = Field(default_factory=list)
     topology_info: Dict[str, Any] = Field(default_factory=dict)
 
 
@@ -34,7 +39,7 @@ class RootCauseAnalysis(dspy.Signature):
     
     root_cause: str = dspy.OutputField(desc="根本原因分析")
     confidence_score: float = dspy.OutputField(desc="置信度评分 0-1")
-    evidence: str = dspy.OutputField(desc="支持证据列表")
+    evidence: List[str] = dspy.OutputField(desc="支持证据列表")
 
 
 class ImpactAssessment(dspy.Signature):
@@ -44,7 +49,23 @@ class ImpactAssessment(dspy.Signature):
     system_metrics: str = dspy.InputField(desc="系统指标")
     
     impact_level: str = dspy.OutputField(desc="影响级别: critical, high, medium, low")
-    affected_components: str = dspy.OutputField(desc="受影响组件列表")
+    affected_components: List[str] = dspy.OutputField(desc="受影响组件列表")
+    business_impact: str = dspy.OutputField(desc="业务影响描述")
+    recovery_time_estimate: str = dspy.OutputField(desc="恢复时间估计")
+
+
+class RootCauseAndImpact(dspy.Signature):
+    """根因分析与影响评估合并签名：一次调用同时给出根因和影响范围"""
+    alert_info: str = dspy.InputField(desc="告警分析结果")
+    system_metrics: str = dspy.InputField(desc="系统指标数据")
+    log_entries: str = dspy.InputField(desc="相关日志条目")
+    topology_info: str = dspy.InputField(desc="系统拓扑信息")
+    
+    root_cause: str = dspy.OutputField(desc="根本原因分析")
+    confidence_score: float = dspy.OutputField(desc="置信度评分 0-1")
+    evidence: List[str] = dspy.OutputField(desc="支持证据列表")
+    impact_level: str = dspy.OutputField(desc="基于上述根因的影响级别: critical, high, medium, low")
+    affected_components: List[str] = dspy.OutputField(desc="受影响组件列表")
     business_impact: str = dspy.OutputField(desc="业务影响描述")
     recovery_time_estimate: str = dspy.OutputField(desc="恢复时间估计")
 
@@ -54,7 +75,7 @@ class SimilarIncidentRetrieval(dspy.Signature):
     current_incident: str = dspy.InputField(desc="当前事件描述")
     historical_incidents: str = dspy.InputField(desc="历史事件数据")
     
-    similar_incidents: str = dspy.OutputField(desc="相似事件ID列表")
+    similar_incidents: List[str] = dspy.OutputField(desc="相似事件ID列表")
     similarity_reasons: str = dspy.OutputField(desc="相似性原因分析")
 
 
@@ -68,11 +89,21 @@ class DiagnosticAgent(dspy.Module):
     - 诊断报告生成
     """
     
-    def __init__(self):
+    def __init__(self, fuse_impact: bool = False):
+        """
+        Args:
+            fuse_impact: 为真时根因分析和影响评估合并为一次 LM 调用，
+                默认保留两步调用以便对比准确率
+        """
         super().__init__()
-        self.root_cause_analyzer = dspy.ChainOfThought(RootCauseAnalysis)
-        self.impact_assessor = dspy.ChainOfThought(ImpactAssessment)
-        self.incident_retriever = dspy.ChainOfThought(SimilarIncidentRetrieval)
+        _configure_litellm_once()
+        self.fuse_impact = fuse_impact
+        if fuse_impact:
+            self.root_cause_and_impact = _shared_predictor(RootCauseAndImpact)
+        else:
+            self.root_cause_analyzer = _shared_predictor(RootCauseAnalysis)
+            self.impact_assessor = _shared_predictor(ImpactAssessment)
+        self.incident_retriever = _shared_predictor(SimilarIncidentRetrieval)
         
     def forward(self, diagnostic_context: DiagnosticContext) -> DiagnosticResult:
         """
@@ -84,19 +115,31 @@ class DiagnosticAgent(dspy.Module):
         Returns:
             DiagnosticResult: 诊断结果
         """
-        # 1. 根因分析
-        root_cause_result = self.root_cause_analyzer(
-            alert_info=self._format_alert_analysis(diagnostic_context.alert_analysis),
-            system_metrics=self._format_system_metrics(diagnostic_context.system_metrics),
-            log_entries=self._format_log_entries(diagnostic_context.log_entries)
-        )
+        # 系统指标只格式化一次，供根因分析和影响评估共用
+        metrics_text = self._format_system_metrics(diagnostic_context.system_metrics)
         
-        # 2. 影响评估
-        impact_result = self.impact_assessor(
-            root_cause=root_cause_result.root_cause,
-            topology_info=self._format_topology_info(diagnostic_context.topology_info),
-            system_metrics=self._format_system_metrics(diagnostic_context.system_metrics)
-        )
+        if self.fuse_impact:
+            # 1-2. 根因分析与影响评估合并为一次调用
+            root_cause_result = impact_result = self.root_cause_and_impact(
+                alert_info=self._format_alert_analysis(diagnostic_context.alert_analysis),
+                system_metrics=metrics_text,
+                log_entries=self._format_log_entries(diagnostic_context.log_entries),
+                topology_info=self._format_topology_info(diagnostic_context.topology_info)
+            )
+        else:
+            # 1. 根因分析
+            root_cause_result = self.root_cause_analyzer(
+                alert_info=self._format_alert_analysis(diagnostic_context.alert_analysis),
+                system_metrics=metrics_text,
+                log_entries=self._format_log_entries(diagnostic_context.log_entries)
+            )
+            
+            # 2. 影响评估
+            impact_result = self.impact_assessor(
+                root_cause=root_cause_result.root_cause,
+                topology_info=self._format_topology_info(diagnostic_context.topology_info),
+                system_metrics=metrics_text
+            )
         
         # 3. 相似事件检索
         similar_incidents = []
@@ -105,64 +148,104 @@ class DiagnosticAgent(dspy.Module):
                 current_incident=self._format_current_incident(diagnostic_context, root_cause_result.root_cause),
                 historical_incidents=self._format_historical_incidents(diagnostic_context.historical_incidents)
             )
-            similar_incidents = similar_result.similar_incidents.split(',') if similar_result.similar_incidents else []
+            similar_incidents = similar_result.similar_incidents or []
         
-        # 4. 生成诊断结果
-        return DiagnosticResult(
+        # 4. 生成诊断结果（字段已由 DSPy 按签名类型解析，跳过 pydantic 校验）
+        return DiagnosticResult.model_construct(
             incident_id=diagnostic_context.alert_analysis.alert_id,
             root_cause=root_cause_result.root_cause,
             confidence_score=root_cause_result.confidence_score,
             impact_assessment=impact_result.impact_level,
-            affected_components=impact_result.affected_components.split(',') if impact_result.affected_components else [],
+            affected_components=impact_result.affected_components or [],
             business_impact=impact_result.business_impact,
             recovery_time_estimate=impact_result.recovery_time_estimate,
             similar_incidents=similar_incidents,
-            evidence=root_cause_result.evidence.split(',') if root_cause_result.evidence else []
+            evidence=root_cause_result.evidence or []
         )
     
-    def _format_alert_analysis(self, analysis: AlertAnalysisResult) -> str:
-        """格式化告警分析结果"""
-        return f"""
-        Alert ID: {analysis.alert_id}
-        Priority: {analysis.priority}
-        Category: {analysis.category}
-        Urgency Score: {analysis.urgency_score}
-        Root Cause Hints: {analysis.root_cause_hints}
-        Recommended Actions: {analysis.recommended_actions}
+    async def diagnose_many(self, contexts: List[DiagnosticContext]) -> List[DiagnosticResult]:
         """
+        并发诊断多个上下文
+        
+        每次诊断在工作线程中运行，并发上限由
+        dspy.settings.configure(async_max_workers=N) 控制
+        
+        Args:
+            contexts: 诊断上下文列表
+            
+        Returns:
+            List[DiagnosticResult]: 与输入顺序一致的诊断结果
+        """
+        diagnose = dspy.asyncify(self)
+        return await asyncio.gather(*(diagnose(context) for context in contexts))
+    
+    def diagnose_batch(self, contexts: List[DiagnosticContext],
+                       num_threads: int = 8) -> List[Optional[DiagnosticResult]]:
+        """
+        同步批量诊断（dspy 并行批处理），失败的条目返回 None
+        
+        Args:
+            contexts: 诊断上下文列表
+            num_threads: 并行线程数
+            
+        Returns:
+            List[Optional[DiagnosticResult]]: 与输入顺序一致的诊断结果
+        """
+        examples = [
+            dspy.Example(diagnostic_context=context).with_inputs("diagnostic_context")
+            for context in contexts
+        ]
+        return self.batch(
+            examples, num_threads=num_threads, max_errors=len(examples) + 1, disable_progress_bar=True
+        )
+    
+    def _format_alert_analysis(self, analysis: AlertAnalysisResult) -> str:
+        """格式化告警分析结果（稳定字段在前，易变字段在后）"""
+        return "\n".join((
+            f"Category: {analysis.category}",
+            f"Priority: {analysis.priority}",
+            f"Recommended Actions: {analysis.recommended_actions}",
+            f"Alert ID: {analysis.alert_id}",
+            f"Urgency Score: {analysis.urgency_score}",
+            f"Root Cause Hints: {analysis.root_cause_hints}"
+        ))
     
     def _format_system_metrics(self, metrics: Dict[str, Any]) -> str:
         """格式化系统指标"""
-        formatted = []
-        for key, value in metrics.items():
-            formatted.append(f"{key}: {value}")
-        return "; ".join(formatted)
+        return "; ".join(f"{key}: {value}" for key, value in metrics.items())
     
-    def _format_log_entries(self, log_entries: List[str]) -> str:
+    def _format_log_entries(self, log_entries: Union[List[str], Deque[str]]) -> str:
         """格式化日志条目"""
-        return "; ".join(log_entries[-20:])  # 只取最近20条
+        return "; ".join(tail(log_entries, 20))  # 只取最近20条
     
     def _format_topology_info(self, topology: Dict[str, Any]) -> str:
         """格式化拓扑信息"""
-        return str(topology)
+        return dumps(topology, sort_keys=True)
     
     def _format_current_incident(self, context: DiagnosticContext, root_cause: str) -> str:
         """格式化当前事件"""
-        return f"""
-        Category: {context.alert_analysis.category}
-        Priority: {context.alert_analysis.priority}
-        Root Cause: {root_cause}
-        Symptoms: {context.alert_analysis.root_cause_hints}
-        """
+        return "\n".join((
+            f"Category: {context.alert_analysis.category}",
+            f"Priority: {context.alert_analysis.priority}",
+            f"Symptoms: {context.alert_analysis.root_cause_hints}",
+            f"Root Cause: {root_cause}"
+        ))
     
-    def _format_historical_incidents(self, incidents: List[Dict[str, Any]]) -> str:
+    def _format_historical_incidents(self, incidents: Union[List[Dict[str, Any]], Deque[Dict[str, Any]]]) -> str:
         """格式化历史事件"""
-        formatted = []
-        for incident in incidents[-10:]:  # 只取最近10个
-            formatted.append(f"ID: {incident.get('id', 'N/A')}, "
-                           f"Category: {incident.get('category', 'N/A')}, "
-                           f"Root Cause: {incident.get('root_cause', 'N/A')}")
-        return "; ".join(formatted)
+        if not incidents:
+            return ""
+        # 只取最近10个，并按事件 ID 排序，保证相同事件集合生成相同文本
+        recent = sorted(tail(incidents, 10), key=lambda incident: str(incident.get('id', '')))
+        return "; ".join(
+            f"ID: {incident.get('id', 'N/A')}, "
+            f"Category: {incident.get('category', 'N/A')}, "
+            f"Root Cause: {incident.get('root_cause', 'N/A')}"
+            for incident in recent
+        )
+
+
+_RETRIEVE_SIGNATURE = "query, context -> relevant_knowledge: str, confidence: float"
 
 
 class KnowledgeBaseRetriever(dspy.Module):
@@ -170,10 +253,7 @@ class KnowledgeBaseRetriever(dspy.Module):
     
     def __init__(self):
         super().__init__()
-        self.retrieve_signature = dspy.Signature(
-            "query, context -> relevant_knowledge: str, confidence: float"
-        )
-        self.retriever = dspy.ChainOfThought(self.retrieve_signature)
+        self.retriever = _shared_predictor(_RETRIEVE_SIGNATURE)
     
     def forward(self, query: str, context: str = "") -> str:
         """
@@ -190,15 +270,15 @@ class KnowledgeBaseRetriever(dspy.Module):
         return result.relevant_knowledge
 
 
+_REASONING_SIGNATURE = "symptoms, rules, facts -> diagnosis: str, reasoning_chain: str"
+
+
 class ExpertSystemReasoner(dspy.Module):
     """专家系统推理模块"""
     
     def __init__(self):
         super().__init__()
-        self.reasoning_signature = dspy.Signature(
-            "symptoms, rules, facts -> diagnosis: str, reasoning_chain: str"
-        )
-        self.reasoner = dspy.ChainOfThought(self.reasoning_signature)
+        self.reasoner = _shared_predictor(_REASONING_SIGNATURE)
     
     def forward(self, symptoms: List[str], rules: List[str], facts: List[str]) -> Dict[str, str]:
         """
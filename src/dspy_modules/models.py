@@ -0,0 +1,19 @@
+"""
+DSPy 模块共用的数据模型
+
+只依赖 pydantic，智能体状态定义等不需要加载 dspy 的地方可以直接导入
+"""
+
+from typing import Any, Dict, List
+from pydantic import BaseModel, Field
+
+
+class AlertInfo(BaseModel):
+    """告警信息模型"""
+    alert_id: str
+    timestamp: str
+    severity: str
+    source: str
+    message: str
+    metrics: Dict[str, Any] = Field(default_factory=dict)
+    tags: List[str] = Field(default_factory=list)
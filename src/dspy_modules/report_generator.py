@@ -1,9 +1,16 @@
+import asyncio
+import re
+from functools import lru_cache
+from itertools import chain
 import dspy
-from typing import Dict, List, Any, Optional
+from typing import Callable, Dict, List, Any, Optional, Tuple
 from pydantic import BaseModel, Field
 from datetime import datetime
 from .diagnostic_agent import DiagnosticResult
 from .action_planner import ActionPlan
+from ..utils.parallel import run_in_parallel
+from ..utils.cache import LRUCache, stable_hash
+from . import _shared_predictor
 
 
 class ExecutionResult(BaseModel):
@@ -72,6 +79,32 @@ class LessonsLearned(dspy.Signature):
     improvement_areas: str = dspy.OutputField(desc="改进领域")
 
 
+_WHITESPACE_RE = re.compile(r"\s+")
+
+
+@lru_cache(maxsize=1024)
+def _incident_data_text(incident_id: str, root_cause: str, business_impact: str,
+                        affected_components: Tuple[str, ...], confidence_score: float) -> str:
+    """按字段缓存事件数据文本，重复生成同一事件的报告时直接复用"""
+    return f"""
+        Incident ID: {incident_id}
+        Root Cause: {root_cause}
+        Impact: {business_impact}
+        Affected Components: {list(affected_components)}
+        Confidence Score: {confidence_score}
+        """
+
+
+@lru_cache(maxsize=1024)
+def _incident_events_text(incident_id: str, root_cause: str, business_impact: str) -> str:
+    """按字段缓存事件序列文本"""
+    return "; ".join((
+        f"Incident detected: {incident_id}",
+        f"Root cause identified: {root_cause}",
+        f"Impact assessed: {business_impact}"
+    ))
+
+
 class ReportGenerator(dspy.Module):
     """报告生成器模块
     
@@ -82,11 +115,20 @@ class ReportGenerator(dspy.Module):
     - 优化建议
     """
     
-    def __init__(self):
+    def __init__(self, recurrence_cache_size: int = 256, llm_timeline: bool = False):
+        """
+        Args:
+            recurrence_cache_size: 同类故障经验教训的缓存容量
+            llm_timeline: 为真时由 LLM 生成时间线，默认按诊断与执行记录
+                确定性构建，节省一次 LM 调用
+        """
         super().__init__()
-        self.report_generator = dspy.ChainOfThought(ReportGeneration)
-        self.timeline_generator = dspy.ChainOfThought(TimelineGeneration)
-        self.lessons_analyzer = dspy.ChainOfThought(LessonsLearned)
+        self.llm_timeline = llm_timeline
+        self.report_generator = _shared_predictor(ReportGeneration)
+        if llm_timeline:
+            self.timeline_generator = _shared_predictor(TimelineGeneration)
+        self.lessons_analyzer = _shared_predictor(LessonsLearned)
+        self._prediction_cache = LRUCache(maxsize=recurrence_cache_size)
         
     def generate_incident_report(self, 
                                 diagnostic_result: DiagnosticResult,
@@ -103,31 +145,44 @@ class ReportGenerator(dspy.Module):
         Returns:
             IncidentReport: 事件报告
         """
-        # 1. 生成报告主体
-        report_result = self.report_generator(
-            incident_data=self._format_incident_data(diagnostic_result),
-            diagnostic_result=str(diagnostic_result),
-            execution_result=str(execution_result)
-        )
+        # 紧凑 JSON 只序列化一次，比 str(model) 更短且各调用复用
+        diagnostic_text = diagnostic_result.model_dump_json(exclude_none=True)
+        execution_text = execution_result.model_dump_json(exclude_none=True)
         
-        # 2. 生成时间线
-        timeline_result = self.timeline_generator(
-            incident_events=self._format_incident_events(diagnostic_result),
-            execution_events=self._format_execution_events(execution_result)
-        )
+        # 经验教训对同类故障（根因、影响范围、处置结果相同）可复用；
+        # 报告主体包含事件 ID 等事件专属内容，每次重新生成
+        recurrence_key = self._recurrence_key(diagnostic_result, execution_result)
         
-        # 3. 生成经验教训
-        lessons_result = self.lessons_analyzer(
-            incident_analysis=str(diagnostic_result),
-            resolution_process=str(execution_result)
-        )
+        # 1-3. 报告主体、经验教训和（可选的）时间线互不依赖，并发执行
+        calls = [
+            lambda: self.report_generator(
+                incident_data=self._format_incident_data(diagnostic_result),
+                diagnostic_result=diagnostic_text,
+                execution_result=execution_text
+            ),
+            lambda: self._reuse_prediction("lessons", recurrence_key, lambda: self.lessons_analyzer(
+                incident_analysis=diagnostic_text,
+                resolution_process=execution_text
+            ))
+        ]
+        if self.llm_timeline:
+            calls.append(lambda: self.timeline_generator(
+                incident_events=self._format_incident_events(diagnostic_result),
+                execution_events=self._format_execution_events(execution_result)
+            ))
+        report_result, lessons_result, *timeline_result = run_in_parallel(*calls)
+        
+        if timeline_result:
+            timeline = self._parse_timeline(timeline_result[0].timeline)
+        else:
+            timeline = self._build_timeline(diagnostic_result, execution_result)
         
         # 4. 构建完整报告
         return IncidentReport(
             incident_id=diagnostic_result.incident_id,
             title=self._generate_title(diagnostic_result),
             summary=report_result.report_summary,
-            timeline=self._parse_timeline(timeline_result.timeline),
+            timeline=timeline,
             root_cause_analysis=diagnostic_result.root_cause,
             impact_analysis=diagnostic_result.business_impact,
             resolution_summary=self._generate_resolution_summary(execution_result),
@@ -136,6 +191,40 @@ class ReportGenerator(dspy.Module):
             metrics=self._calculate_metrics(diagnostic_result, execution_result)
         )
     
+    async def generate_incident_reports_bulk(
+            self,
+            requests: List[Tuple[DiagnosticResult, ActionPlan, ExecutionResult]],
+            max_concurrency: int = 8) -> List[IncidentReport]:
+        """
+        并发生成多份事件报告
+        
+        并发上限取 max_concurrency 与 dspy.settings.async_max_workers 中的较小值，
+        实际吞吐受模型服务的速率限制约束；单份报告生成失败时返回降级报告
+        
+        Args:
+            requests: (诊断结果, 行动计划, 执行结果) 列表
+            max_concurrency: 最大并发数
+            
+        Returns:
+            List[IncidentReport]: 与输入顺序一致的事件报告
+        """
+        generate = dspy.asyncify(self.generate_incident_report)
+        semaphore = asyncio.Semaphore(max(1, max_concurrency))
+        
+        async def generate_one(diagnostic_result, action_plan, execution_result):
+            async with semaphore:
+                return await generate(diagnostic_result, action_plan, execution_result)
+        
+        results = await asyncio.gather(
+            *(generate_one(*request) for request in requests),
+            return_exceptions=True
+        )
+        return [
+            self._fallback_incident_report(request[0], request[2], result)
+            if isinstance(result, Exception) else result
+            for request, result in zip(requests, results)
+        ]
+    
     def generate_performance_report(self, 
                                    system_metrics: Dict[str, Any],
                                    time_period: str) -> PerformanceReport:
@@ -164,32 +253,71 @@ class ReportGenerator(dspy.Module):
             optimization_suggestions=suggestions
         )
     
+    def _recurrence_key(self, diagnostic_result: DiagnosticResult,
+                        execution_result: ExecutionResult) -> str:
+        """计算同类故障的归一化键（根因文本忽略大小写和空白差异）
+        
+        包含经验教训分析会用到的全部事件内容，只忽略事件 ID、时间和证据等事件专属字段
+        """
+        root_cause = _WHITESPACE_RE.sub(" ", diagnostic_result.root_cause).strip().lower()
+        return stable_hash(
+            root_cause,
+            diagnostic_result.impact_assessment,
+            diagnostic_result.business_impact,
+            sorted(diagnostic_result.affected_components),
+            execution_result.status,
+            execution_result.executed_steps,
+            execution_result.failed_steps
+        )
+    
+    def _reuse_prediction(self, name: str, key: str, call: Callable[[], Any]) -> Any:
+        """同类故障命中时复用已有预测结果，否则调用 LLM 并写入缓存"""
+        cache_key = (name, key)
+        prediction = self._prediction_cache.get(cache_key)
+        if prediction is None:
+            prediction = call()
+            self._prediction_cache.set(cache_key, prediction)
+        return prediction
+    
+    def _fallback_incident_report(self, diagnostic_result: DiagnosticResult,
+                                  execution_result: ExecutionResult,
+                                  error: Exception) -> IncidentReport:
+        """生成降级事件报告（不调用 LLM）"""
+        return IncidentReport(
+            incident_id=diagnostic_result.incident_id,
+            title=self._generate_title(diagnostic_result),
+            summary=f"Report generation failed: {error}",
+            root_cause_analysis=diagnostic_result.root_cause,
+            impact_analysis=diagnostic_result.business_impact,
+            resolution_summary=self._generate_resolution_summary(execution_result),
+            metrics=self._calculate_metrics(diagnostic_result, execution_result)
+        )
+    
     def _format_incident_data(self, diagnostic_result: DiagnosticResult) -> str:
         """格式化事件数据"""
-        return f"""
-        Incident ID: {diagnostic_result.incident_id}
-        Root Cause: {diagnostic_result.root_cause}
-        Impact: {diagnostic_result.business_impact}
-        Affected Components: {diagnostic_result.affected_components}
-        Confidence Score: {diagnostic_result.confidence_score}
-        """
+        return _incident_data_text(
+            diagnostic_result.incident_id,
+            diagnostic_result.root_cause,
+            diagnostic_result.business_impact,
+            tuple(diagnostic_result.affected_components),
+            diagnostic_result.confidence_score
+        )
     
     def _format_incident_events(self, diagnostic_result: DiagnosticResult) -> str:
         """格式化事件序列"""
-        events = []
-        events.append(f"Incident detected: {diagnostic_result.incident_id}")
-        events.append(f"Root cause identified: {diagnostic_result.root_cause}")
-        events.append(f"Impact assessed: {diagnostic_result.business_impact}")
-        return "; ".join(events)
+        return _incident_events_text(
+            diagnostic_result.incident_id,
+            diagnostic_result.root_cause,
+            diagnostic_result.business_impact
+        )
     
     def _format_execution_events(self, execution_result: ExecutionResult) -> str:
         """格式化执行序列"""
-        events = []
-        events.append(f"Execution started: {execution_result.execution_start}")
-        for step in execution_result.executed_steps:
-            events.append(f"Step executed: {step}")
-        events.append(f"Execution ended: {execution_result.execution_end}")
-        return "; ".join(events)
+        return "; ".join(chain(
+            (f"Execution started: {execution_result.execution_start}",),
+            (f"Step executed: {step}" for step in execution_result.executed_steps),
+            (f"Execution ended: {execution_result.execution_end}",)
+        ))
     
     def _generate_title(self, diagnostic_result: DiagnosticResult) -> str:
         """生成报告标题"""
@@ -204,32 +332,58 @@ class ReportGenerator(dspy.Module):
         else:
             return f"Partially resolved incident. {len(execution_result.executed_steps)} steps succeeded, {len(execution_result.failed_steps)} failed."
     
+    def _build_timeline(self, diagnostic_result: DiagnosticResult,
+                        execution_result: ExecutionResult) -> List[Dict[str, Any]]:
+        """按诊断与执行记录确定性地构建时间线（步骤无独立时间戳，取执行开始时间）"""
+        started = execution_result.execution_start.isoformat()
+        ended = execution_result.execution_end.isoformat()
+        events = [
+            (started, f"Incident detected: {diagnostic_result.incident_id}", "detection"),
+            (started, f"Root cause identified: {diagnostic_result.root_cause}", "diagnosis"),
+            (started, f"Impact assessed: {diagnostic_result.business_impact}", "diagnosis"),
+            (started, "Execution started", "action"),
+            *((started, f"Step executed: {step}", "action") for step in execution_result.executed_steps),
+            *((started, f"Step failed: {step}", "action") for step in execution_result.failed_steps),
+            (ended, f"Execution ended: {execution_result.status}", "resolution")
+        ]
+        return [
+            {
+                "sequence": i,
+                "timestamp": timestamp,
+                "event": event,
+                "type": event_type
+            }
+            for i, (timestamp, event, event_type) in enumerate(events, 1)
+        ]
+    
     def _parse_timeline(self, timeline_text: str) -> List[Dict[str, Any]]:
         """解析时间线"""
-        timeline = []
-        events = timeline_text.split(';')
-        
-        for i, event in enumerate(events):
-            if event.strip():
-                timeline.append({
-                    "sequence": i + 1,
-                    "timestamp": datetime.now().isoformat(),
-                    "event": event.strip(),
-                    "type": "action"
-                })
-        
-        return timeline
+        # 时间戳在循环外只取一次
+        timestamp = datetime.now().isoformat()
+        return [
+            {
+                "sequence": i + 1,
+                "timestamp": timestamp,
+                "event": event,
+                "type": "action"
+            }
+            for i, event in enumerate(map(str.strip, timeline_text.split(';')))
+            if event
+        ]
     
     def _calculate_metrics(self, diagnostic_result: DiagnosticResult, execution_result: ExecutionResult) -> Dict[str, Any]:
         """计算指标"""
         duration = (execution_result.execution_end - execution_result.execution_start).total_seconds()
+        executed = len(execution_result.executed_steps)
+        failed = len(execution_result.failed_steps)
+        total = executed + failed
         
         return {
             "resolution_time_seconds": duration,
             "confidence_score": diagnostic_result.confidence_score,
-            "steps_executed": len(execution_result.executed_steps),
-            "steps_failed": len(execution_result.failed_steps),
-            "success_rate": len(execution_result.executed_steps) / (len(execution_result.executed_steps) + len(execution_result.failed_steps)) if (execution_result.executed_steps or execution_result.failed_steps) else 0
+            "steps_executed": executed,
+            "steps_failed": failed,
+            "success_rate": executed / total if total else 0
         }
     
     def _analyze_trends(self, metrics: Dict[str, Any]) -> str:
@@ -287,15 +441,15 @@ class ReportGenerator(dspy.Module):
         }
 
 
+_FORMATTING_SIGNATURE = "report_content, format_type -> formatted_report: str"
+
+
 class ReportFormatter(dspy.Module):
     """报告格式化器"""
     
     def __init__(self):
         super().__init__()
-        self.formatting_signature = dspy.Signature(
-            "report_content, format_type -> formatted_report: str"
-        )
-        self.formatter = dspy.ChainOfThought(self.formatting_signature)
+        self.formatter = _shared_predictor(_FORMATTING_SIGNATURE, dspy.Predict)
     
     def format_report(self, report: IncidentReport, format_type: str = "markdown") -> str:
         """
@@ -309,22 +463,22 @@ class ReportFormatter(dspy.Module):
             str: 格式化后的报告
         """
         result = self.formatter(
-            report_content=str(report),
+            report_content=report.model_dump_json(exclude_defaults=True, exclude_none=True),
             format_type=format_type
         )
         
         return result.formatted_report
 
 
+_ARCHIVING_SIGNATURE = "report_data, retention_policy -> archive_location: str, metadata: str"
+
+
 class ReportArchiver(dspy.Module):
     """报告归档器"""
     
     def __init__(self):
         super().__init__()
-        self.archiving_signature = dspy.Signature(
-            "report_data, retention_policy -> archive_location: str, metadata: str"
-        )
-        self.archiver = dspy.ChainOfThought(self.archiving_signature)
+        self.archiver = _shared_predictor(_ARCHIVING_SIGNATURE, dspy.Predict)
     
     def archive_report(self, report: IncidentReport, retention_policy: str) -> Dict[str, str]:
         """
@@ -338,7 +492,7 @@ class ReportArchiver(dspy.Module):
             Dict: 归档信息
         """
         result = self.archiver(
-            report_data=str(report),
+            report_data=report.model_dump_json(exclude_defaults=True, exclude_none=True),
             retention_policy=retention_policy
         )
         
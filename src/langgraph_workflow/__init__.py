@@ -1,10 +1,29 @@
-from .ops_workflow import OpsWorkflow, OpsState
-from .workflow_nodes import WorkflowNodes
-from .state_manager import StateManager
+import importlib
+
+# 按需导入子模块，避免导入包时加载 DSPy 和 LangGraph
+_LAZY_EXPORTS = {
+    "OpsWorkflow": ".ops_workflow",
+    "OpsState": ".state_manager",
+    "WorkflowNodes": ".workflow_nodes",
+    "StateManager": ".state_manager",
+}
 
 __all__ = [
     "OpsWorkflow",
     "OpsState", 
     "WorkflowNodes",
     "StateManager"
-]
\ No newline at end of file
+]
+
+
+def __getattr__(name):
+    module_name = _LAZY_EXPORTS.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module_name, __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
@@ -5,6 +5,14 @@ from .state_manager import OpsState, StateManager
 from .workflow_nodes import WorkflowNodes
 
 
+async def _enumerate_async(iterator):
+    """异步迭代器的 enumerate"""
+    index = 0
+    async for item in iterator:
+        yield index, item
+        index += 1
+
+
 class OpsWorkflow:
     """智能运维工作流
     
@@ -147,16 +155,26 @@ class OpsWorkflow:
             self.compile()
         
         # 初始化状态
-        if initial_state is None:
+        owns_state = initial_state is None
+        if owns_state:
             initial_state = self.state_manager.initialize_state(
                 workflow_id=f"ops_{asyncio.get_event_loop().time()}"
             )
         
-        # 运行工作流
-        result = await self.compiled_graph.ainvoke(
-            initial_state,
-            config={"recursion_limit": max_iterations}
-        )
+        # 运行工作流，逐步跟踪合并后的状态
+        # 首个 values 是输入状态，自建时 initialize_state 已记入历史
+        result = None
+        try:
+            async for step, result in _enumerate_async(self.compiled_graph.astream(
+                initial_state,
+                config={"recursion_limit": max_iterations},
+                stream_mode="values"
+            )):
+                self.state_manager.track_state(result, record=step > 0 or not owns_state)
+        finally:
+            # 工作流结果是新字典，自建的初始状态不再被引用时归还对象池
+            if owns_state:
+                self.state_manager.release(initial_state)
         
         return result
     
@@ -175,17 +193,28 @@ class OpsWorkflow:
             self.compile()
         
         # 初始化状态
-        if initial_state is None:
+        owns_state = initial_state is None
+        if owns_state:
             initial_state = self.state_manager.initialize_state(
                 workflow_id=f"ops_{asyncio.get_event_loop().time()}"
             )
         
-        # 流式运行工作流
-        async for step in self.compiled_graph.astream(
-            initial_state,
-            config={"recursion_limit": max_iterations}
-        ):
-            yield step
+        # 流式运行工作流：对外产出每步增量，同时跟踪合并后的完整状态
+        record = not owns_state
+        try:
+            async for mode, chunk in self.compiled_graph.astream(
+                initial_state,
+                config={"recursion_limit": max_iterations},
+                stream_mode=["updates", "values"]
+            ):
+                if mode == "values":
+                    self.state_manager.track_state(chunk, record=record)
+                    record = True
+                else:
+                    yield chunk
+        finally:
+            if owns_state:
+                self.state_manager.release(initial_state)
     
     def get_state_snapshot(self, workflow_id: str) -> Optional[Dict[str, Any]]:
         """获取状态快照
@@ -1,17 +1,35 @@
 """
 LangGraph Studio 集成模块
 直接导出编译好的图供 Studio 使用
+
+工作流实例和编译图在首次访问 `graph` / `workflow` 时才创建
 """
+from functools import cache
+
 from src.langgraph_workflow.ops_workflow import OpsWorkflow
 
-# 创建工作流实例
-_workflow_instance = OpsWorkflow()
 
-# 编译图 - 这是 Studio 需要的主要对象
-graph = _workflow_instance.compile()
+@cache
+def _workflow_instance() -> OpsWorkflow:
+    """创建工作流实例（进程内只创建一次）"""
+    return OpsWorkflow()
+
+
+@cache
+def _graph():
+    """编译工作流图（进程内只编译一次）"""
+    return _workflow_instance().compile()
+
+
+def __getattr__(name: str):
+    # 编译图 - 这是 Studio 需要的主要对象
+    if name == "graph":
+        return _graph()
+    # 同时导出工作流实例供其他用途
+    if name == "workflow":
+        return _workflow_instance()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
-# 同时导出工作流实例供其他用途
-workflow = _workflow_instance
 
 # 导出供 LangGraph Studio 使用
-__all__ = ["graph", "workflow"]
\ No newline at end of file
+__all__ = ["graph", "workflow"]
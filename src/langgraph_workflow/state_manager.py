@@ -1,5 +1,7 @@
+import operator
+from collections import deque
 from typing import List, Dict, Any, Optional
-from typing_extensions import TypedDict
+from typing_extensions import Annotated, TypedDict
 from datetime import datetime
 from pydantic import BaseModel, Field
 from ..dspy_modules.alert_analyzer import AlertInfo, AlertAnalysisResult
@@ -13,7 +15,7 @@ class OpsState(TypedDict):
     # 告警相关
     current_alert: Optional[AlertInfo]
     alert_analysis: Optional[AlertAnalysisResult]
-    historical_alerts: List[AlertInfo]
+    historical_alerts: Annotated[List[AlertInfo], operator.add]
     
     # 诊断相关
     diagnostic_context: Dict[str, Any]
@@ -32,7 +34,7 @@ class OpsState(TypedDict):
     workflow_status: str  # active, paused, completed, failed
     
     # 历史和学习
-    incident_history: List[Dict[str, Any]]
+    incident_history: Annotated[List[Dict[str, Any]], operator.add]
     learning_data: Dict[str, Any]
     
     # 报告
@@ -44,7 +46,7 @@ class OpsState(TypedDict):
     last_update: datetime
     
     # 错误处理
-    errors: List[str]
+    errors: Annotated[List[str], operator.add]
     retry_count: int
     max_retries: int
 
@@ -52,15 +54,56 @@ class OpsState(TypedDict):
 class StateManager:
     """状态管理器"""
     
+    # 状态对象池容量
+    POOL_SIZE = 64
+    
+    VALID_STAGES = frozenset({"monitoring", "alerting", "diagnosis", "planning", "execution", "reporting"})
+    VALID_STATUSES = frozenset({"active", "paused", "completed", "failed"})
+    # 各阶段必须具备的前置字段：阶段 -> (字段, 错误信息)
+    STAGE_REQUIREMENTS = {
+        "alerting": ("current_alert", "Alert stage requires current_alert"),
+        "diagnosis": ("alert_analysis", "Diagnosis stage requires alert_analysis"),
+        "planning": ("diagnostic_result", "Planning stage requires diagnostic_result"),
+        "execution": ("action_plan", "Execution stage requires action_plan"),
+    }
+    
     def __init__(self):
         self.state_history: List[OpsState] = []
         self.current_state: Optional[OpsState] = None
+        self._pool: "deque[OpsState]" = deque(maxlen=self.POOL_SIZE)
+    
+    def borrow(self) -> OpsState:
+        """从对象池借出一个空状态字典"""
+        if self._pool:
+            return self._pool.popleft()
+        return OpsState()
+    
+    def release(self, state: OpsState) -> None:
+        """归还不再使用的状态字典
+        
+        仍作为 current_state 被引用的状态不会回收，快照、暂停/恢复和指标查询依赖它
+        """
+        if state is self.current_state or any(pooled is state for pooled in self._pool):
+            return
+        state.clear()
+        self._pool.append(state)
+    
+    def track_state(self, state: OpsState, record: bool = True) -> OpsState:
+        """将工作流合并后的状态设为当前状态，并记入状态历史
+        
+        节点只返回增量，不再经过 update_state，历史由工作流在每步合并后记录
+        """
+        self.current_state = state
+        if record:
+            self.state_history.append(state.copy())
+        return state
     
     def initialize_state(self, workflow_id: str) -> OpsState:
         """初始化状态"""
         now = datetime.now()
         
-        state = OpsState(
+        state = self.borrow()
+        state.update(
             current_alert=None,
             alert_analysis=None,
             historical_alerts=[],
@@ -99,6 +142,27 @@ class StateManager:
         
         return state
     
+    def build_update(self, state: OpsState, updates: Dict[str, Any],
+                     now: Optional[datetime] = None) -> Dict[str, Any]:
+        """构建工作流节点返回的增量更新
+        
+        只返回变化的字段，由 LangGraph 合并到状态中；historical_alerts、
+        incident_history 和 errors 带有累加 reducer，这里只需给出新增的条目。
+        节点已取过当前时间时可通过 now 传入，避免重复读取时钟
+        """
+        if "workflow_stage" in updates and updates["workflow_stage"] not in self.VALID_STAGES:
+            raise ValueError(f"Invalid stage: {updates['workflow_stage']}")
+        if "workflow_status" in updates and updates["workflow_status"] not in self.VALID_STATUSES:
+            raise ValueError(f"Invalid status: {updates['workflow_status']}")
+        
+        delta = {key: value for key, value in updates.items() if key in state}
+        delta["last_update"] = now or datetime.now()
+        return delta
+    
+    def error_update(self, error: str) -> Dict[str, Any]:
+        """构建追加错误的增量更新"""
+        return {"errors": [error], "last_update": datetime.now()}
+    
     def get_state_history(self) -> List[OpsState]:
         """获取状态历史"""
         return self.state_history.copy()
@@ -135,9 +199,7 @@ class StateManager:
     
     def transition_stage(self, state: OpsState, new_stage: str) -> OpsState:
         """转换工作流阶段"""
-        valid_stages = ["monitoring", "alerting", "diagnosis", "planning", "execution", "reporting"]
-        
-        if new_stage in valid_stages:
+        if new_stage in self.VALID_STAGES:
             state["workflow_stage"] = new_stage
             state["last_update"] = datetime.now()
         else:
@@ -147,9 +209,7 @@ class StateManager:
     
     def update_workflow_status(self, state: OpsState, status: str) -> OpsState:
         """更新工作流状态"""
-        valid_statuses = ["active", "paused", "completed", "failed"]
-        
-        if status in valid_statuses:
+        if status in self.VALID_STATUSES:
             state["workflow_status"] = status
             state["last_update"] = datetime.now()
         else:
@@ -182,18 +242,10 @@ class StateManager:
             if not state.get(field):
                 errors.append(f"Missing required field: {field}")
         
-        # 检查状态一致性
-        if state["workflow_stage"] == "alerting" and not state["current_alert"]:
-            errors.append("Alert stage requires current_alert")
-        
-        if state["workflow_stage"] == "diagnosis" and not state["alert_analysis"]:
-            errors.append("Diagnosis stage requires alert_analysis")
-        
-        if state["workflow_stage"] == "planning" and not state["diagnostic_result"]:
-            errors.append("Planning stage requires diagnostic_result")
-        
-        if state["workflow_stage"] == "execution" and not state["action_plan"]:
-            errors.append("Execution stage requires action_plan")
+        # 检查状态一致性（按当前阶段查表，只检查该阶段的前置字段）
+        requirement = self.STAGE_REQUIREMENTS.get(state["workflow_stage"])
+        if requirement and not state[requirement[0]]:
+            errors.append(requirement[1])
         
         # 检查重试次数
         if state["retry_count"] > state["max_retries"]:
@@ -224,11 +276,11 @@ class StateManager:
             "status": state["workflow_status"],
             "start_time": state["start_time"].isoformat(),
             "last_update": state["last_update"].isoformat(),
-            "current_alert": state["current_alert"].dict() if state["current_alert"] else None,
-            "alert_analysis": state["alert_analysis"].dict() if state["alert_analysis"] else None,
-            "diagnostic_result": state["diagnostic_result"].dict() if state["diagnostic_result"] else None,
-            "action_plan": state["action_plan"].dict() if state["action_plan"] else None,
-            "execution_result": state["execution_result"].dict() if state["execution_result"] else None,
+            "current_alert": state["current_alert"].model_dump() if state["current_alert"] else None,
+            "alert_analysis": state["alert_analysis"].model_dump() if state["alert_analysis"] else None,
+            "diagnostic_result": state["diagnostic_result"].model_dump() if state["diagnostic_result"] else None,
+            "action_plan": state["action_plan"].model_dump() if state["action_plan"] else None,
+            "execution_result": state["execution_result"].model_dump() if state["execution_result"] else None,
             "system_metrics": state["system_metrics"],
             "errors": state["errors"],
             "retry_count": state["retry_count"]
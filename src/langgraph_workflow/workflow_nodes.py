@@ -1,4 +1,5 @@
 import asyncio
+import itertools
 from typing import Dict, Any, List, Optional
 from datetime import datetime
 from ..dspy_modules.alert_analyzer import AlertAnalyzer, AlertInfo, AlertAnalysisResult
@@ -6,7 +7,10 @@ from ..dspy_modules.diagnostic_agent import DiagnosticAgent, DiagnosticContext
 from ..dspy_modules.action_planner import ActionPlanner
 from ..dspy_modules.report_generator import ReportGenerator, ExecutionResult
 from .state_manager import OpsState, StateManager
-from ..utils.llm_config import setup_deepseek_llm, get_llm_config_from_env
+from ..utils.llm_config import setup_cached_llm, get_llm_config_from_env
+
+# 告警 ID 序号，保证同一秒内生成的 ID 不重复
+_ALERT_SEQ = itertools.count()
 
 
 class WorkflowNodes:
@@ -27,7 +31,7 @@ class WorkflowNodes:
         """设置 LLM 配置"""
         try:
             config = get_llm_config_from_env()
-            self.dspy_lm, self.langchain_llm = setup_deepseek_llm(config)
+            self.dspy_lm, self.langchain_llm = setup_cached_llm(config)
             print(f"✅ LLM 配置完成: {config.provider} - {config.model_name}")
         except Exception as e:
             print(f"⚠️ LLM 配置失败: {e}")
@@ -35,24 +39,26 @@ class WorkflowNodes:
             self.dspy_lm = None
             self.langchain_llm = None
     
-    async def monitor_collect_node(self, state: OpsState) -> OpsState:
+    async def monitor_collect_node(self, state: OpsState) -> Dict[str, Any]:
         """监控数据采集节点"""
         try:
+            now = datetime.now()
+            
             # 模拟监控数据采集
-            monitoring_data = await self._collect_monitoring_data()
+            monitoring_data = await self._collect_monitoring_data(now)
             
             # 更新系统指标
-            state = self.state_manager.update_state(state, {
+            updates = {
                 "system_metrics": monitoring_data["metrics"],
                 "system_context": monitoring_data["context"]
-            })
+            }
             
             # 检查是否有新告警
             if monitoring_data.get("alerts"):
                 # 创建告警信息
-                alert_info = AlertInfo(
+                updates["current_alert"] = AlertInfo(
                     alert_id=monitoring_data["alerts"][0]["id"],
-                    timestamp=datetime.now().isoformat(),
+                    timestamp=now.isoformat(),
                     severity=monitoring_data["alerts"][0]["severity"],
                     source=monitoring_data["alerts"][0]["source"],
                     message=monitoring_data["alerts"][0]["message"],
@@ -60,47 +66,38 @@ class WorkflowNodes:
                     tags=monitoring_data["alerts"][0].get("tags", [])
                 )
                 
-                state = self.state_manager.update_state(state, {
-                    "current_alert": alert_info
-                })
-                
                 # 转换到告警处理阶段
-                state = self.state_manager.transition_stage(state, "alerting")
+                updates["workflow_stage"] = "alerting"
             
-            return state
+            return self.state_manager.build_update(state, updates, now)
             
         except Exception as e:
-            state = self.state_manager.add_error(state, f"Monitor collect error: {str(e)}")
-            return state
+            return self.state_manager.error_update(f"Monitor collect error: {str(e)}")
     
-    async def alert_process_node(self, state: OpsState) -> OpsState:
+    async def alert_process_node(self, state: OpsState) -> Dict[str, Any]:
         """告警处理节点"""
         try:
             if not state["current_alert"]:
                 raise ValueError("No current alert to process")
             
             # 分析告警
-            alert_analysis = self.alert_analyzer.forward(
+            alert_analysis = await asyncio.to_thread(
+                self.alert_analyzer.forward,
                 alert_info=state["current_alert"],
                 historical_alerts=state["historical_alerts"]
             )
             
-            # 更新状态
-            state = self.state_manager.update_state(state, {
+            # 更新状态并转换到诊断阶段（历史告警由 reducer 追加）
+            return self.state_manager.build_update(state, {
                 "alert_analysis": alert_analysis,
-                "historical_alerts": state["historical_alerts"] + [state["current_alert"]]
+                "historical_alerts": [state["current_alert"]],
+                "workflow_stage": "diagnosis"
             })
             
-            # 转换到诊断阶段
-            state = self.state_manager.transition_stage(state, "diagnosis")
-            
-            return state
-            
         except Exception as e:
-            state = self.state_manager.add_error(state, f"Alert process error: {str(e)}")
-            return state
+            return self.state_manager.error_update(f"Alert process error: {str(e)}")
     
-    async def diagnosis_node(self, state: OpsState) -> OpsState:
+    async def diagnosis_node(self, state: OpsState) -> Dict[str, Any]:
         """故障诊断节点"""
         try:
             if not state["alert_analysis"]:
@@ -116,50 +113,43 @@ class WorkflowNodes:
             )
             
             # 执行诊断
-            diagnostic_result = self.diagnostic_agent.forward(diagnostic_context)
+            diagnostic_result = await asyncio.to_thread(
+                self.diagnostic_agent.forward, diagnostic_context
+            )
             
-            # 更新状态
-            state = self.state_manager.update_state(state, {
-                "diagnostic_context": diagnostic_context.dict(),
-                "diagnostic_result": diagnostic_result
+            # 更新状态并转换到规划阶段
+            return self.state_manager.build_update(state, {
+                "diagnostic_context": diagnostic_context.model_dump(),
+                "diagnostic_result": diagnostic_result,
+                "workflow_stage": "planning"
             })
             
-            # 转换到规划阶段
-            state = self.state_manager.transition_stage(state, "planning")
-            
-            return state
-            
         except Exception as e:
-            state = self.state_manager.add_error(state, f"Diagnosis error: {str(e)}")
-            return state
+            return self.state_manager.error_update(f"Diagnosis error: {str(e)}")
     
-    async def action_plan_node(self, state: OpsState) -> OpsState:
+    async def action_plan_node(self, state: OpsState) -> Dict[str, Any]:
         """行动规划节点"""
         try:
             if not state["diagnostic_result"]:
                 raise ValueError("No diagnostic result for action planning")
             
             # 生成行动计划
-            action_plan = self.action_planner.forward(
+            action_plan = await asyncio.to_thread(
+                self.action_planner.forward,
                 diagnostic_result=state["diagnostic_result"],
                 system_context=state["system_context"]
             )
             
-            # 更新状态
-            state = self.state_manager.update_state(state, {
-                "action_plan": action_plan
+            # 更新状态并转换到执行阶段
+            return self.state_manager.build_update(state, {
+                "action_plan": action_plan,
+                "workflow_stage": "execution"
             })
             
-            # 转换到执行阶段
-            state = self.state_manager.transition_stage(state, "execution")
-            
-            return state
-            
         except Exception as e:
-            state = self.state_manager.add_error(state, f"Action planning error: {str(e)}")
-            return state
+            return self.state_manager.error_update(f"Action planning error: {str(e)}")
     
-    async def action_execute_node(self, state: OpsState) -> OpsState:
+    async def action_execute_node(self, state: OpsState) -> Dict[str, Any]:
         """自动化执行节点"""
         try:
             if not state["action_plan"]:
@@ -168,61 +158,50 @@ class WorkflowNodes:
             # 执行行动计划
             execution_result = await self._execute_action_plan(state["action_plan"])
             
-            # 更新状态
-            state = self.state_manager.update_state(state, {
-                "execution_result": execution_result
+            # 更新状态并转换到报告阶段
+            return self.state_manager.build_update(state, {
+                "execution_result": execution_result,
+                "workflow_stage": "reporting"
             })
             
-            # 转换到报告阶段
-            state = self.state_manager.transition_stage(state, "reporting")
-            
-            return state
-            
         except Exception as e:
-            state = self.state_manager.add_error(state, f"Action execution error: {str(e)}")
-            return state
+            return self.state_manager.error_update(f"Action execution error: {str(e)}")
     
-    async def report_generate_node(self, state: OpsState) -> OpsState:
+    async def report_generate_node(self, state: OpsState) -> Dict[str, Any]:
         """报告生成节点"""
         try:
             if not all([state["diagnostic_result"], state["action_plan"], state["execution_result"]]):
                 raise ValueError("Missing required data for report generation")
             
             # 生成事件报告
-            incident_report = self.report_generator.generate_incident_report(
+            incident_report = await asyncio.to_thread(
+                self.report_generator.generate_incident_report,
                 diagnostic_result=state["diagnostic_result"],
                 action_plan=state["action_plan"],
                 execution_result=state["execution_result"]
             )
             
-            # 更新状态
-            state = self.state_manager.update_state(state, {
-                "incident_report": incident_report
-            })
-            
             # 将事件添加到历史记录
+            now = datetime.now()
             incident_record = {
                 "incident_id": incident_report.incident_id,
-                "timestamp": datetime.now().isoformat(),
+                "timestamp": now.isoformat(),
                 "root_cause": incident_report.root_cause_analysis,
                 "resolution": incident_report.resolution_summary,
                 "lessons_learned": incident_report.lessons_learned
             }
             
-            state = self.state_manager.update_state(state, {
-                "incident_history": state["incident_history"] + [incident_record]
-            })
-            
-            # 完成工作流
-            state = self.state_manager.update_workflow_status(state, "completed")
-            
-            return state
+            # 更新状态并完成工作流（历史记录由 reducer 追加）
+            return self.state_manager.build_update(state, {
+                "incident_report": incident_report,
+                "incident_history": [incident_record],
+                "workflow_status": "completed"
+            }, now)
             
         except Exception as e:
-            state = self.state_manager.add_error(state, f"Report generation error: {str(e)}")
-            return state
+            return self.state_manager.error_update(f"Report generation error: {str(e)}")
     
-    async def feedback_learn_node(self, state: OpsState) -> OpsState:
+    async def feedback_learn_node(self, state: OpsState) -> Dict[str, Any]:
         """反馈学习节点"""
         try:
             # 收集反馈数据
@@ -232,49 +211,46 @@ class WorkflowNodes:
             learning_data = state["learning_data"].copy()
             learning_data.update(feedback_data)
             
-            state = self.state_manager.update_state(state, {
-                "learning_data": learning_data
-            })
-            
             # 重置工作流到监控状态
-            state = self.state_manager.transition_stage(state, "monitoring")
-            state = self.state_manager.reset_retry(state)
-            
-            return state
+            return self.state_manager.build_update(state, {
+                "learning_data": learning_data,
+                "workflow_stage": "monitoring",
+                "retry_count": 0
+            })
             
         except Exception as e:
-            state = self.state_manager.add_error(state, f"Feedback learning error: {str(e)}")
-            return state
+            return self.state_manager.error_update(f"Feedback learning error: {str(e)}")
     
-    async def error_handling_node(self, state: OpsState) -> OpsState:
+    async def error_handling_node(self, state: OpsState) -> Dict[str, Any]:
         """错误处理节点"""
         try:
             # 检查是否可以重试
             if self.state_manager.can_retry(state):
-                state = self.state_manager.increment_retry(state)
-                
                 # 根据错误类型决定重试策略
-                if "Alert process error" in str(state["errors"]):
-                    state = self.state_manager.transition_stage(state, "alerting")
-                elif "Diagnosis error" in str(state["errors"]):
-                    state = self.state_manager.transition_stage(state, "diagnosis")
-                elif "Action planning error" in str(state["errors"]):
-                    state = self.state_manager.transition_stage(state, "planning")
-                elif "Action execution error" in str(state["errors"]):
-                    state = self.state_manager.transition_stage(state, "execution")
+                errors = str(state["errors"])
+                if "Alert process error" in errors:
+                    stage = "alerting"
+                elif "Diagnosis error" in errors:
+                    stage = "diagnosis"
+                elif "Action planning error" in errors:
+                    stage = "planning"
+                elif "Action execution error" in errors:
+                    stage = "execution"
                 else:
-                    state = self.state_manager.transition_stage(state, "monitoring")
-            else:
-                # 超过重试次数，标记为失败
-                state = self.state_manager.update_workflow_status(state, "failed")
+                    stage = "monitoring"
+                
+                return self.state_manager.build_update(state, {
+                    "retry_count": state["retry_count"] + 1,
+                    "workflow_stage": stage
+                })
             
-            return state
+            # 超过重试次数，标记为失败
+            return self.state_manager.build_update(state, {"workflow_status": "failed"})
             
         except Exception as e:
-            state = self.state_manager.add_error(state, f"Error handling error: {str(e)}")
-            return state
+            return self.state_manager.error_update(f"Error handling error: {str(e)}")
     
-    async def _collect_monitoring_data(self) -> Dict[str, Any]:
+    async def _collect_monitoring_data(self, now: datetime) -> Dict[str, Any]:
         """收集监控数据"""
         # 模拟监控数据收集
         await asyncio.sleep(0.1)
@@ -300,7 +276,7 @@ class WorkflowNodes:
             },
             "alerts": [
                 {
-                    "id": f"alert_{datetime.now().strftime('%Y%m%d_%H%M%S')}",
+                    "id": f"alert_{now:%Y%m%d_%H%M%S}_{next(_ALERT_SEQ)}",
                     "severity": "high",
                     "source": "monitoring_system",
                     "message": "CPU usage exceeds 70% threshold",
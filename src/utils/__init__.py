@@ -1,6 +1,27 @@
-from .llm_config import LLMConfig, setup_deepseek_llm
+import importlib
+
+# 按需导入子模块，避免导入 cache / serialization 等轻量工具时加载 DSPy 和 LangChain
+_LAZY_EXPORTS = {
+    "LLMConfig": ".llm_config",
+    "setup_deepseek_llm": ".llm_config",
+    "setup_cached_llm": ".llm_config",
+}
 
 __all__ = [
     "LLMConfig",
-    "setup_deepseek_llm"
-]
\ No newline at end of file
+    "setup_deepseek_llm",
+    "setup_cached_llm"
+]
+
+
+def __getattr__(name):
+    module_name = _LAZY_EXPORTS.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module_name, __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
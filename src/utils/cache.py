@@ -0,0 +1,105 @@
+"""
+缓存工具模块
+提供进程内 LRU 缓存和输入指纹计算
+"""
+
+import copy
+import functools
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Hashable, Optional
+
+from .serialization import dumps
+
+_MISSING = object()
+
+
+def fingerprint(payload: Any) -> str:
+    """计算输入数据的稳定指纹（SHA-256）"""
+    data = json.dumps(payload, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(data.encode("utf-8")).hexdigest()
+
+
+def stable_hash(*parts: Any) -> str:
+    """对输入做规范化 JSON 序列化后计算 BLAKE2b 摘要"""
+    return hashlib.blake2b(dumps(parts, sort_keys=True).encode("utf-8"), digest_size=16).hexdigest()
+
+
+class LRUCache:
+    """基于 OrderedDict 的 LRU 缓存
+
+    读写都会调整 OrderedDict 的顺序，由锁保护，可在线程池的多个线程间共享
+    """
+
+    def __init__(self, maxsize: int = 128):
+        self.maxsize = maxsize
+        self._data: "OrderedDict[Hashable, Any]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable, default: Optional[Any] = None) -> Any:
+        """获取缓存值，命中时刷新访问顺序"""
+        with self._lock:
+            try:
+                self._data.move_to_end(key)
+                return self._data[key]
+            except KeyError:
+                return default
+
+    def set(self, key: Hashable, value: Any) -> None:
+        """写入缓存，超出容量时淘汰最久未使用的条目"""
+        if self.maxsize <= 0:
+            return
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def clear(self) -> None:
+        """清空缓存"""
+        with self._lock:
+            self._data.clear()
+
+    def __deepcopy__(self, memo: dict) -> "LRUCache":
+        """复制条目，锁不参与拷贝（DSPy 复制模块时会深拷贝其属性）"""
+        clone = LRUCache(self.maxsize)
+        with self._lock:
+            clone._data = copy.deepcopy(self._data, memo)
+        return clone
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._data
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+def cached_forward(maxsize: int = 1024, key: Optional[Callable[..., Hashable]] = None):
+    """为 DSPy 模块的 forward 增加按输入缓存结果的装饰器
+
+    Args:
+        maxsize: 每个模块实例的缓存容量
+        key: 由 forward 参数计算缓存键的函数，默认对全部参数做 stable_hash
+    """
+    def decorator(forward):
+        cache_attr = f"_{forward.__name__}_cache"
+
+        @functools.wraps(forward)
+        def wrapper(self, *args, **kwargs):
+            cache = self.__dict__.get(cache_attr)
+            if cache is None:
+                cache = self.__dict__[cache_attr] = LRUCache(maxsize)
+
+            cache_key = key(*args, **kwargs) if key else stable_hash(args, kwargs)
+            result = cache.get(cache_key, _MISSING)
+            if result is _MISSING:
+                result = forward(self, *args, **kwargs)
+                cache.set(cache_key, result)
+            # 返回副本，避免调用方修改缓存中的结果
+            return copy.deepcopy(result)
+
+        return wrapper
+
+    return decorator
@@ -5,10 +5,13 @@ LLM 配置模块
 
 import os
 import dspy
-from typing import Dict, Any, Optional
+import httpx
+import litellm
+from functools import lru_cache
+from typing import Dict, Any, Optional, Tuple
 from langchain_community.llms import Ollama
 from langchain_openai import ChatOpenAI
-from dataclasses import dataclass
+from dataclasses import dataclass, astuple
 
 
 @dataclass
@@ -21,6 +24,12 @@ class LLMConfig:
     temperature: float = 0.1
     max_tokens: int = 2000
     timeout: int = 60
+    # LM 响应缓存：按完整请求精确匹配，磁盘缓存在进程重启后仍然有效
+    cache_dir: Optional[str] = None  # None 时使用 DSPy 默认目录
+    cache_memory_entries: int = 10_000
+    # LiteLLM 共享 HTTP 连接池上限
+    max_connections: int = 64
+    max_keepalive_connections: int = 32
 
 
 class DeepSeekLLM(dspy.LM):
@@ -123,6 +132,9 @@ def setup_deepseek_llm(config: Optional[LLMConfig] = None) -> tuple:
     if config is None:
         config = LLMConfig()
     
+    _configure_response_cache(config)
+    _configure_http_pool(config)
+    
     # 设置环境变量
     if not os.getenv("DEEPSEEK_API_KEY"):
         api_key = config.api_key or os.getenv("DEEPSEEK_API_KEY")
@@ -137,7 +149,8 @@ def setup_deepseek_llm(config: Optional[LLMConfig] = None) -> tuple:
             api_key=config.api_key or os.getenv("DEEPSEEK_API_KEY"),
             base_url=config.base_url or "https://api.deepseek.com/v1",
             temperature=config.temperature,
-            max_tokens=config.max_tokens
+            max_tokens=config.max_tokens,
+            timeout=config.timeout
         )
         
         # LangChain LLM 配置 (使用 OpenAI 兼容接口)
@@ -156,7 +169,8 @@ def setup_deepseek_llm(config: Optional[LLMConfig] = None) -> tuple:
             model=f"openai/{config.model_name}",
             api_key=config.api_key,
             temperature=config.temperature,
-            max_tokens=config.max_tokens
+            max_tokens=config.max_tokens,
+            timeout=config.timeout
         )
         
         langchain_llm = ChatOpenAI(
@@ -187,6 +201,78 @@ def setup_deepseek_llm(config: Optional[LLMConfig] = None) -> tuple:
     return dspy_lm, langchain_llm
 
 
+def _configure_response_cache(config: LLMConfig) -> None:
+    """配置 DSPy 的 LM 响应缓存（内存 LRU + 磁盘持久化）"""
+    _configure_dspy_cache(config.cache_dir, config.cache_memory_entries)
+
+
+@lru_cache(maxsize=1)
+def _configure_dspy_cache(cache_dir: Optional[str], memory_entries: int) -> None:
+    """替换进程全局的 DSPy 缓存，参数不变时只执行一次，避免丢弃已有的内存缓存条目"""
+    cache_kwargs = {"memory_max_entries": memory_entries}
+    if cache_dir:
+        cache_kwargs["disk_cache_dir"] = cache_dir
+    dspy.configure_cache(enable_disk_cache=True, enable_memory_cache=True, **cache_kwargs)
+
+
+# LiteLLM 共享 HTTP 连接池，按 (超时, 最大连接数, 最大保活连接数) 区分
+_HTTP_SESSIONS: Dict[Tuple[int, int, int], Tuple[httpx.Client, httpx.AsyncClient]] = {}
+
+
+def _configure_http_pool(config: LLMConfig) -> None:
+    """让 LiteLLM 使用与当前配置匹配的共享 HTTP 连接池
+    
+    连接池按超时和连接数上限区分，配置不同时切换到对应的连接池，
+    与 DSPy 默认 LM 一样跟随最近设置的配置；宿主应用自行设置的会话保持不变
+    """
+    key = (config.timeout, config.max_connections, config.max_keepalive_connections)
+    sessions = _HTTP_SESSIONS.get(key)
+    if sessions is None:
+        limits = httpx.Limits(
+            max_connections=config.max_connections,
+            max_keepalive_connections=config.max_keepalive_connections
+        )
+        sessions = _HTTP_SESSIONS.setdefault(key, (
+            httpx.Client(limits=limits, timeout=config.timeout),
+            httpx.AsyncClient(limits=limits, timeout=config.timeout)
+        ))
+    
+    own_clients = [client for client, _ in _HTTP_SESSIONS.values()]
+    own_aclients = [aclient for _, aclient in _HTTP_SESSIONS.values()]
+    if litellm.client_session is None or any(litellm.client_session is c for c in own_clients):
+        litellm.client_session = sessions[0]
+    if litellm.aclient_session is None or any(litellm.aclient_session is c for c in own_aclients):
+        litellm.aclient_session = sessions[1]
+
+
+@lru_cache(maxsize=8)
+def _cached_setup_llm(config_fingerprint: tuple) -> tuple:
+    """按配置指纹缓存 LLM 客户端"""
+    return setup_deepseek_llm(LLMConfig(*config_fingerprint))
+
+
+def setup_cached_llm(config: Optional[LLMConfig] = None) -> tuple:
+    """
+    设置 LLM，相同配置复用已创建的客户端
+    
+    Args:
+        config: LLM 配置
+        
+    Returns:
+        tuple: (dspy_lm, langchain_llm)
+    """
+    if config is None:
+        config = LLMConfig()
+    
+    dspy_lm, langchain_llm = _cached_setup_llm(astuple(config))
+    
+    # 缓存命中时同样需要设置 DSPy 默认 LM 和对应的 HTTP 连接池
+    _configure_http_pool(config)
+    dspy.settings.configure(lm=dspy_lm)
+    
+    return dspy_lm, langchain_llm
+
+
 def get_llm_config_from_env() -> LLMConfig:
     """从环境变量获取 LLM 配置"""
     return LLMConfig(
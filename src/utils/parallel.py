@@ -0,0 +1,38 @@
+"""
+并行调用工具模块
+在共享线程池中并发执行相互独立的 DSPy 预测器调用
+"""
+
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, List
+
+import dspy
+
+_executor = ThreadPoolExecutor(max_workers=8, thread_name_prefix="dspy-parallel")
+_worker_state = threading.local()
+
+
+def _run_with_settings(call: Callable[[], Any], settings: dict) -> Any:
+    """在工作线程中以调用方的 DSPy 配置执行"""
+    _worker_state.active = True
+    try:
+        with dspy.context(**settings):
+            return call()
+    finally:
+        _worker_state.active = False
+
+
+def run_in_parallel(*calls: Callable[[], Any]) -> List[Any]:
+    """并发执行多个无参调用，按传入顺序返回结果
+
+    第一个调用在当前线程执行，其余提交到线程池；已在线程池中的调用
+    顺序执行，避免嵌套提交占满线程池
+    """
+    if len(calls) <= 1 or getattr(_worker_state, "active", False):
+        return [call() for call in calls]
+
+    settings = dict(dspy.settings.config)
+    futures = [_executor.submit(_run_with_settings, call, settings) for call in calls[1:]]
+    first = calls[0]()
+    return [first] + [future.result() for future in futures]
@@ -0,0 +1,18 @@
+"""
+序列工具模块
+"""
+
+from itertools import islice
+from typing import List, Reversible, TypeVar
+
+T = TypeVar("T")
+
+
+def tail(entries: Reversible[T], n: int) -> List[T]:
+    """取最后 n 个元素（保持原顺序）
+
+    同时支持 list 和 deque（deque 不支持切片），只遍历末尾 n 个元素
+    """
+    items = list(islice(reversed(entries), n))
+    items.reverse()
+    return items
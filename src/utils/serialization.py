@@ -0,0 +1,54 @@
+"""
+序列化工具模块
+优先使用 orjson，未安装时回退到标准库 json
+"""
+
+import json
+from datetime import date, datetime
+from enum import Enum
+from typing import Any
+
+from pydantic import BaseModel
+
+try:
+    import orjson
+except ImportError:  # orjson 为可选依赖
+    orjson = None
+
+
+def _default(obj: Any) -> Any:
+    """处理默认编码器不支持的类型"""
+    if isinstance(obj, BaseModel):
+        return obj.model_dump(mode="json")
+    if isinstance(obj, (datetime, date)):
+        return obj.isoformat()
+    if isinstance(obj, Enum):
+        return obj.value
+    if isinstance(obj, (set, frozenset, tuple)):
+        return list(obj)
+    return str(obj)
+
+
+def dumps_bytes(payload: Any, sort_keys: bool = False) -> bytes:
+    """序列化为 UTF-8 JSON 字节串，sort_keys 为真时输出规范化（键有序）的 JSON"""
+    if orjson is not None:
+        option = orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+        if sort_keys:
+            option |= orjson.OPT_SORT_KEYS
+        return orjson.dumps(payload, default=_default, option=option)
+    return json.dumps(
+        payload, ensure_ascii=False, default=_default, sort_keys=sort_keys,
+        separators=(",", ":")
+    ).encode("utf-8")
+
+
+def dumps(payload: Any, sort_keys: bool = False) -> str:
+    """序列化为 JSON 字符串"""
+    return dumps_bytes(payload, sort_keys).decode("utf-8")
+
+
+def loads(data: Any) -> Any:
+    """解析 JSON 字符串或字节串"""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
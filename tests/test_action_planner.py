@@ -0,0 +1,51 @@
+"""行动规划模块测试"""
+
+import threading
+
+import pytest
+
+from src.dspy_modules.action_planner import ActionPlan, ActionPlanner
+from src.dspy_modules.diagnostic_agent import DiagnosticResult
+
+
+def _diagnosis(incident_id):
+    return DiagnosticResult(incident_id=incident_id, root_cause="disk full", confidence_score=0.9,
+                            impact_assessment="high", business_impact="writes failing",
+                            recovery_time_estimate="10m")
+
+
+@pytest.fixture
+def planner(monkeypatch):
+    planner = ActionPlanner()
+    barrier = threading.Barrier(3, timeout=5)
+
+    def forward(diagnostic_result, system_context):
+        if system_context.get("concurrent"):
+            barrier.wait()
+        if system_context.get("fail"):
+            raise RuntimeError("lm unavailable")
+        return ActionPlan(plan_id=f"PLAN-{diagnostic_result.incident_id}",
+                          incident_id=diagnostic_result.incident_id, priority="high",
+                          estimated_duration=10, risk_assessment="low")
+
+    monkeypatch.setattr(planner, "forward", forward)
+    return planner
+
+
+async def test_plan_many_runs_concurrently_in_order(planner):
+    requests = [(_diagnosis(f"INC-{i}"), {"concurrent": True}) for i in range(3)]
+
+    plans = await planner.plan_many(requests)
+
+    assert [plan.plan_id for plan in plans] == ["PLAN-INC-0", "PLAN-INC-1", "PLAN-INC-2"]
+
+
+async def test_plan_many_propagates_errors(planner):
+    with pytest.raises(RuntimeError):
+        await planner.plan_many([(_diagnosis("INC-1"), {"fail": True})])
+
+
+def test_plan_batch_returns_none_for_failures(planner):
+    plans = planner.plan_batch([(_diagnosis("INC-1"), {}), (_diagnosis("INC-2"), {"fail": True})])
+
+    assert [plan and plan.plan_id for plan in plans] == ["PLAN-INC-1", None]
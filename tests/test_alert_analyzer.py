@@ -0,0 +1,129 @@
+"""告警分析模块测试"""
+
+import dspy
+import pytest
+
+from src.dspy_modules.alert_analyzer import AlertAnalysisResult, AlertAnalyzer, AlertFilter, AlertInfo
+
+
+def _alert(alert_id, message="cpu usage high", source="node-1", severity="high"):
+    return AlertInfo(alert_id=alert_id, timestamp="2024-01-01T00:00:00",
+                     severity=severity, source=source, message=message)
+
+
+def _row(alert_id, priority="high", category="cpu"):
+    return AlertAnalysisResult(alert_id=alert_id, priority=priority, category=category,
+                               urgency_score=0.5, root_cause_hints=[f"hint {priority}"])
+
+
+@pytest.fixture
+def analyzer(monkeypatch):
+    analyzer = AlertAnalyzer()
+    fallback_calls = []
+
+    def batch_forward(alerts, historical_alerts=None, num_threads=8):
+        fallback_calls.append([alert.alert_id for alert in alerts])
+        return [_row(alert.alert_id, priority="low") for alert in alerts]
+
+    monkeypatch.setattr(analyzer, "batch_forward", batch_forward)
+    analyzer.fallback_calls = fallback_calls
+    return analyzer
+
+
+def _batch_output(monkeypatch, analyzer, rows):
+    monkeypatch.setattr(analyzer, "analyze_alerts", lambda **kwargs: dspy.Prediction(analyses=rows))
+
+
+def test_duplicate_ids_keep_positional_results(monkeypatch, analyzer):
+    _batch_output(monkeypatch, analyzer, [_row("a", "critical"), _row("a", "medium")])
+
+    results = analyzer.analyze_batch([_alert("a", "disk full"), _alert("a", "cpu high")])
+
+    assert [result.priority for result in results] == ["critical", "medium"]
+    assert results[0] is not results[1]
+    assert analyzer.fallback_calls == []
+
+
+def test_missing_rows_fall_back_by_position(monkeypatch, analyzer):
+    _batch_output(monkeypatch, analyzer, [_row("a", "critical")])
+
+    results = analyzer.analyze_batch([_alert("a"), _alert("b"), _alert("c")])
+
+    assert [result.alert_id for result in results] == ["a", "b", "c"]
+    assert [result.priority for result in results] == ["critical", "low", "low"]
+    assert analyzer.fallback_calls == [["b", "c"]]
+
+
+def test_mismatched_row_is_reanalyzed(monkeypatch, analyzer):
+    _batch_output(monkeypatch, analyzer, [_row("b", "critical"), _row("a", "critical")])
+
+    results = analyzer.analyze_batch([_alert("a"), _alert("b")])
+
+    assert [result.alert_id for result in results] == ["a", "b"]
+    assert analyzer.fallback_calls == [["a", "b"]]
+
+
+def test_unparseable_batch_falls_back(monkeypatch, analyzer):
+    def fail(**kwargs):
+        raise ValueError("bad output")
+
+    monkeypatch.setattr(analyzer, "analyze_alerts", fail)
+
+    results = analyzer.analyze_batch([_alert("a"), _alert("b")])
+
+    assert [result.priority for result in results] == ["low", "low"]
+    assert analyzer.fallback_calls == [["a", "b"]]
+
+
+def test_batch_results_are_normalized(monkeypatch, analyzer):
+    _batch_output(monkeypatch, analyzer, [_row("a", "HIGH"), _row("b", "critical", "Memory")])
+
+    results = analyzer.analyze_batch([_alert("a"), _alert("b")])
+
+    assert results[0].priority == "high"
+    assert results[1].category == "memory"
+    assert results[1].recommended_actions
+
+
+def test_empty_batch(analyzer):
+    assert analyzer.analyze_batch([]) == []
+
+
+@pytest.fixture
+def alert_filter(monkeypatch):
+    alert_filter = AlertFilter(blocked_sources=["synthetic-probe"])
+    lm_calls = []
+
+    def filter_predictor(**kwargs):
+        lm_calls.append(kwargs["alert_message"])
+        return dspy.Prediction(should_process=True, filter_reason="needs attention")
+
+    monkeypatch.setattr(alert_filter, "filter_predictor", filter_predictor)
+    return alert_filter, lm_calls
+
+
+@pytest.mark.parametrize("alert", [
+    _alert("a", severity="low"),
+    _alert("a", severity="INFO"),
+    _alert("a", source="synthetic-probe"),
+    _alert("a", message="Heartbeat missed once"),
+])
+def test_filter_rules_reject_without_lm(alert_filter, alert):
+    alert_filter, lm_calls = alert_filter
+
+    assert alert_filter(alert) is False
+    assert lm_calls == []
+
+
+def test_filter_accepts_critical_without_lm(alert_filter):
+    alert_filter, lm_calls = alert_filter
+
+    assert alert_filter(_alert("a", severity="Critical")) is True
+    assert lm_calls == []
+
+
+def test_filter_asks_lm_when_rules_are_undecided(alert_filter):
+    alert_filter, lm_calls = alert_filter
+
+    assert alert_filter(_alert("a", severity="medium")) is True
+    assert lm_calls == ["cpu usage high"]
@@ -0,0 +1,71 @@
+"""告警微批处理测试"""
+
+import asyncio
+import threading
+
+import pytest
+
+from src.agents.alert_batcher import AlertBatcher
+from src.dspy_modules.alert_analyzer import AlertInfo
+
+
+def _alert(alert_id):
+    return AlertInfo(alert_id=alert_id, timestamp="2024-01-01T00:00:00",
+                     severity="high", source="node-1", message="cpu usage high")
+
+
+class _Analyzer:
+    """按批记录调用的分析器，drop 指定每批丢弃的结果条数"""
+
+    def __init__(self, drop=0):
+        self.drop = drop
+        self.batches = []
+
+    def analyze_batch(self, alerts):
+        self.batches.append([alert.alert_id for alert in alerts])
+        results = [f"result-{alert.alert_id}" for alert in alerts]
+        return results[:len(results) - self.drop]
+
+
+async def test_concurrent_alerts_share_one_batch():
+    analyzer = _Analyzer()
+    batcher = AlertBatcher(analyzer, max_batch=8, batch_window_ms=50)
+
+    results = await asyncio.gather(*(batcher.submit(_alert(i)) for i in "abc"))
+    await batcher.close()
+
+    assert results == ["result-a", "result-b", "result-c"]
+    assert analyzer.batches == [["a", "b", "c"]]
+
+
+async def test_short_result_list_fails_unanswered_alerts():
+    batcher = AlertBatcher(_Analyzer(drop=1), max_batch=8, batch_window_ms=50)
+
+    results = await asyncio.wait_for(
+        asyncio.gather(*(batcher.submit(_alert(i)) for i in "ab"), return_exceptions=True),
+        timeout=5
+    )
+    await batcher.close()
+
+    assert results[0] == "result-a"
+    assert isinstance(results[1], RuntimeError)
+
+
+async def test_close_fails_in_flight_and_queued_alerts():
+    release = threading.Event()
+
+    class _SlowAnalyzer(_Analyzer):
+        def analyze_batch(self, alerts):
+            release.wait(5)
+            return super().analyze_batch(alerts)
+
+    batcher = AlertBatcher(_SlowAnalyzer(), max_batch=1, batch_window_ms=0)
+    submits = [asyncio.create_task(batcher.submit(_alert(i))) for i in "ab"]
+    await asyncio.sleep(0.05)
+
+    await batcher.close()
+    release.set()
+
+    for task in submits:
+        with pytest.raises(RuntimeError):
+            await asyncio.wait_for(task, timeout=5)
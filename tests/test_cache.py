@@ -0,0 +1,94 @@
+"""缓存工具测试"""
+
+import copy
+from concurrent.futures import ThreadPoolExecutor
+
+from src.utils.cache import LRUCache, cached_forward, fingerprint, stable_hash
+
+
+def test_lru_evicts_least_recently_used():
+    cache = LRUCache(maxsize=2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+
+    assert "a" in cache and "c" in cache
+    assert "b" not in cache
+    assert cache.get("b", "missing") == "missing"
+
+
+def test_lru_is_safe_across_threads():
+    cache = LRUCache(maxsize=8)
+
+    def work(worker):
+        for i in range(2000):
+            key = (worker + i) % 16
+            cache.set(key, i)
+            cache.get((key + 1) % 16)
+
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        list(executor.map(work, range(8)))
+
+    assert len(cache) == 8
+
+
+def test_lru_deepcopy_copies_entries():
+    cache = LRUCache(maxsize=4)
+    cache.set("a", [1])
+
+    clone = copy.deepcopy(cache)
+    clone.get("a").append(2)
+    clone.set("b", 2)
+
+    assert cache.get("a") == [1]
+    assert "b" not in cache
+
+
+def test_fingerprint_ignores_key_order():
+    assert fingerprint({"a": 1, "b": [1, 2]}) == fingerprint({"b": [1, 2], "a": 1})
+    assert fingerprint({"a": 1}) != fingerprint({"a": 2})
+    assert stable_hash("x", {"a": 1}) == stable_hash("x", {"a": 1})
+
+
+class _Module:
+    def __init__(self):
+        self.calls = 0
+
+    @cached_forward(maxsize=2)
+    def forward(self, payload):
+        self.calls += 1
+        return {"payload": payload, "items": []}
+
+    @cached_forward(key=lambda payload, extra=None: payload["id"])
+    def by_id(self, payload, extra=None):
+        self.calls += 1
+        return extra
+
+
+def test_cached_forward_reuses_results_per_instance():
+    first, second = _Module(), _Module()
+
+    first.forward({"x": 1})
+    first.forward({"x": 1})
+    second.forward({"x": 1})
+
+    assert first.calls == 1
+    assert second.calls == 1
+
+
+def test_cached_forward_returns_copies():
+    module = _Module()
+
+    module.forward("a")["items"].append("changed")
+
+    assert module.forward("a")["items"] == []
+    assert module.calls == 1
+
+
+def test_cached_forward_custom_key():
+    module = _Module()
+
+    assert module.by_id({"id": 1}, extra="first") == "first"
+    assert module.by_id({"id": 1}, extra="second") == "first"
+    assert module.calls == 1
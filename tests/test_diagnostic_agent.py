@@ -0,0 +1,51 @@
+"""诊断模块测试"""
+
+import threading
+
+import pytest
+
+from src.dspy_modules.alert_analyzer import AlertAnalysisResult
+from src.dspy_modules.diagnostic_agent import DiagnosticAgent, DiagnosticContext, DiagnosticResult
+
+
+def _context(alert_id):
+    return DiagnosticContext(alert_analysis=AlertAnalysisResult(
+        alert_id=alert_id, priority="high", category="cpu", urgency_score=0.8
+    ))
+
+
+@pytest.fixture
+def agent(monkeypatch):
+    agent = DiagnosticAgent()
+    barrier = threading.Barrier(3, timeout=5)
+
+    def forward(diagnostic_context):
+        alert_id = diagnostic_context.alert_analysis.alert_id
+        if alert_id.startswith("concurrent"):
+            barrier.wait()
+        if alert_id.startswith("fail"):
+            raise RuntimeError("lm unavailable")
+        return DiagnosticResult(incident_id=f"INC-{alert_id}", root_cause="cpu spike",
+                                confidence_score=0.6, impact_assessment="medium",
+                                business_impact="none", recovery_time_estimate="1m")
+
+    monkeypatch.setattr(agent, "forward", forward)
+    return agent
+
+
+async def test_diagnose_many_runs_concurrently_in_order(agent):
+    ids = ["concurrent-1", "concurrent-2", "concurrent-3"]
+
+    results = await agent.diagnose_many([_context(i) for i in ids])
+
+    assert [result.incident_id for result in results] == [f"INC-{i}" for i in ids]
+
+
+def test_diagnose_batch_returns_none_for_failures(agent):
+    results = agent.diagnose_batch([_context("a"), _context("fail-b"), _context("c")])
+
+    assert [result and result.incident_id for result in results] == ["INC-a", None, "INC-c"]
+
+
+def test_diagnose_batch_survives_all_failures(agent):
+    assert agent.diagnose_batch([_context("fail-a"), _context("fail-b")]) == [None, None]
@@ -0,0 +1,21 @@
+"""DSPy 模块包级工具测试"""
+
+import litellm
+
+import src.dspy_modules as dspy_modules
+
+
+def test_configure_litellm_keeps_host_callbacks(monkeypatch):
+    def host_callback(*args, **kwargs):
+        pass
+
+    monkeypatch.setattr(dspy_modules, "_litellm_configured", False)
+    monkeypatch.setattr(litellm, "success_callback", [host_callback])
+    monkeypatch.setattr(litellm, "failure_callback", [host_callback])
+    monkeypatch.setattr(litellm, "set_verbose", True)
+
+    dspy_modules._configure_litellm_once()
+
+    assert litellm.success_callback == [host_callback]
+    assert litellm.failure_callback == [host_callback]
+    assert litellm.set_verbose is False
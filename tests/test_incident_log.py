@@ -0,0 +1,51 @@
+"""IncidentLog 环形缓冲区测试"""
+
+from datetime import datetime
+
+import pytest
+
+from src.agents.incident_log import IncidentLog
+
+
+def _fill(log: IncidentLog, values):
+    for seconds, success in values:
+        log.append(datetime(2024, 1, 1), seconds, success)
+
+
+def test_grows_until_capacity():
+    log = IncidentLog(capacity=4, initial_capacity=1)
+    _fill(log, [(1.0, True), (2.0, False), (3.0, True)])
+
+    assert len(log) == 3
+    assert len(log.success) == 4  # 1 -> 2 -> 4，不超过容量上限
+    assert log.avg_resolution_time() == pytest.approx(2.0)
+    assert log.success_rate() == pytest.approx(2 / 3)
+
+
+def test_wraparound_overwrites_oldest():
+    log = IncidentLog(capacity=3, initial_capacity=1)
+    _fill(log, [(1.0, False), (2.0, False), (3.0, True), (4.0, True), (5.0, True)])
+
+    assert len(log) == 3
+    assert len(log.success) == 3
+    # 第 4、5 条覆盖了最旧的第 1、2 条
+    assert list(log.resolution_seconds) == [4.0, 5.0, 3.0]
+    assert log._next == 2
+    assert log.avg_resolution_time() == pytest.approx(4.0)
+    assert log.success_rate() == pytest.approx(1.0)
+
+
+def test_task_type_defaults_to_unknown():
+    log = IncidentLog(capacity=2)
+    log.append(datetime(2024, 1, 1), 1.0, True)
+    log.append(datetime(2024, 1, 1), 1.0, True, task_type=3)
+
+    assert list(log.task_types[:len(log)]) == [-1, 3]
+
+
+def test_empty_log_metrics():
+    log = IncidentLog()
+
+    assert len(log) == 0
+    assert log.avg_resolution_time() == 0.0
+    assert log.success_rate() == 0.0
@@ -0,0 +1,152 @@
+"""智能运维智能体测试"""
+
+from datetime import datetime
+
+import pytest
+
+from src.agents.intelligent_ops_agent import (
+    AgentConfig, AgentManager, FusedOpsStage, IntelligentOpsAgent, TaskType
+)
+from src.dspy_modules.action_planner import ActionPlan
+from src.dspy_modules.alert_analyzer import AlertAnalysisResult, AlertInfo
+from src.dspy_modules.diagnostic_agent import DiagnosticResult
+
+
+def _alert(alert_id="a1", timestamp="2024-01-01T00:00:00", message="cpu usage high"):
+    return {"alert_id": alert_id, "timestamp": timestamp, "severity": "high",
+            "source": "node-1", "message": message}
+
+
+@pytest.fixture
+def agent_runs(monkeypatch):
+    runs = []
+
+    async def run_agent_task(self, initial_state):
+        alert_info = initial_state["alert_info"]
+        runs.append(alert_info.alert_id)
+        return {
+            "status": "success",
+            "task_type": "process_alert",
+            "results": {"alert_id": alert_info.alert_id},
+            "errors": [],
+            "timestamp": alert_info.timestamp,
+        }
+
+    monkeypatch.setattr(IntelligentOpsAgent, "_run_agent_task", run_agent_task)
+    return IntelligentOpsAgent(AgentConfig(agent_id="test-agent")), runs
+
+
+async def test_redelivered_alert_is_served_from_cache(agent_runs):
+    agent, runs = agent_runs
+    first = await agent.process_alert(_alert())
+    second = await agent.process_alert(_alert(timestamp="2024-01-01T00:05:00"))
+
+    assert runs == ["a1"]
+    assert "cached" not in first
+    assert second["cached"] is True
+    assert second["results"] == first["results"]
+    metrics = agent.get_performance_metrics()
+    assert metrics["alert_cache_hits"] == 1
+
+
+async def test_distinct_alerts_with_same_content_are_not_merged(agent_runs):
+    agent, runs = agent_runs
+    first = await agent.process_alert(_alert("a1"))
+    second = await agent.process_alert(_alert("a2"))
+
+    assert runs == ["a1", "a2"]
+    assert first["results"]["alert_id"] == "a1"
+    assert second["results"]["alert_id"] == "a2"
+    assert "cached" not in second
+
+
+async def test_cache_hits_do_not_count_as_incidents(agent_runs):
+    agent, _ = agent_runs
+    agent.incident_log.append(timestamp=datetime.now(),
+                              resolution_seconds=10.0, success=False)
+
+    await agent.process_alert(_alert())
+    await agent.process_alert(_alert())
+
+    assert len(agent.incident_log) == 1
+    assert agent.get_performance_metrics()["average_resolution_time"] == pytest.approx(10.0)
+    assert agent.get_performance_metrics()["success_rate"] == 0.0
+
+
+class _Graph:
+    """直接返回输入状态的已编译图"""
+
+    async def ainvoke(self, state, config=None):
+        return dict(state, task_output={"status": "success", "results": {}})
+
+
+async def test_system_status_counts_agents_that_processed_work():
+    manager = AgentManager()
+    busy = manager.create_agent(AgentConfig(agent_id="busy"))
+    manager.create_agent(AgentConfig(agent_id="idle"))
+    busy.compiled_graph = _Graph()
+
+    await busy.diagnose_issue(["cpu usage high"], {})
+    status = manager.get_system_status()
+
+    assert status["total_agents"] == 2
+    assert status["active_agents"] == 1
+    assert [entry["status"]["status"] for entry in status["agent_list"]] == ["ready", "ready"]
+
+
+class _Analyzer:
+    def forward(self, alert_info, historical_alerts):
+        return AlertAnalysisResult(alert_id=alert_info.alert_id, priority="high",
+                                   category="cpu", urgency_score=0.8)
+
+
+class _Diagnoser:
+    def __init__(self):
+        self.contexts = []
+
+    def forward(self, context):
+        self.contexts.append(context)
+        return DiagnosticResult(incident_id=f"INC-{context.alert_analysis.alert_id}",
+                                root_cause="runaway process", confidence_score=0.7,
+                                impact_assessment="high", business_impact="slow checkout",
+                                recovery_time_estimate="5m")
+
+
+class _Planner:
+    def forward(self, diagnosis, context):
+        if context.get("fail"):
+            raise RuntimeError("planner unavailable")
+        return ActionPlan(plan_id="PLAN-1", incident_id=diagnosis.incident_id, priority="high",
+                          estimated_duration=5, risk_assessment="low")
+
+
+def test_fused_stage_passes_typed_results_between_stages():
+    diagnoser = _Diagnoser()
+    stage = FusedOpsStage(_Analyzer(), diagnoser, _Planner())
+    alert_info = AlertInfo(**_alert(), metrics={"cpu": 0.95})
+
+    result = stage.run(alert_info, {"log_entries": ["oom"]})
+
+    context = diagnoser.contexts[0]
+    assert context.alert_analysis is result.analysis
+    assert context.system_metrics == {"cpu": 0.95}
+    assert context.log_entries == ["oom"]
+    assert result.action_plan.incident_id == "INC-a1"
+    assert result.to_dict()["diagnosis"]["root_cause"] == "runaway process"
+
+
+async def test_handle_alert_runs_fused_stage(agent_runs):
+    agent, runs = agent_runs
+    agent._fused_stage = FusedOpsStage(_Analyzer(), _Diagnoser(), _Planner())
+
+    result = await agent.handle_alert(_alert())
+    failed = await agent.handle_alert(_alert(), {"fail": True})
+
+    assert runs == []
+    assert result["status"] == "success"
+    assert result["task_type"] == "handle_alert"
+    assert result["results"]["action_plan"]["plan_id"] == "PLAN-1"
+    assert failed["status"] == "error"
+    assert failed["error"] == "planner unavailable"
+    assert list(agent.incident_log.task_types[:2]) == [TaskType.HANDLE_ALERT] * 2
+    assert agent.get_performance_metrics()["success_rate"] == pytest.approx(0.5)
@@ -0,0 +1,37 @@
+"""LLM 配置测试"""
+
+import httpx
+import litellm
+import pytest
+
+from src.utils.llm_config import LLMConfig, _configure_http_pool
+
+
+@pytest.fixture(autouse=True)
+def _restore_sessions(monkeypatch):
+    monkeypatch.setattr(litellm, "client_session", None)
+    monkeypatch.setattr(litellm, "aclient_session", None)
+
+
+def test_http_pool_follows_config_timeout():
+    _configure_http_pool(LLMConfig(timeout=30))
+    first = litellm.client_session
+    _configure_http_pool(LLMConfig(timeout=90))
+
+    assert litellm.client_session is not first
+    assert litellm.client_session.timeout.read == 90
+    assert litellm.aclient_session.timeout.read == 90
+
+    _configure_http_pool(LLMConfig(timeout=30))
+    assert litellm.client_session is first
+
+
+def test_http_pool_keeps_host_sessions():
+    host_client = httpx.Client()
+    litellm.client_session = host_client
+
+    _configure_http_pool(LLMConfig(timeout=45))
+
+    assert litellm.client_session is host_client
+    assert litellm.aclient_session.timeout.read == 45
+    host_client.close()
@@ -0,0 +1,45 @@
+"""并行调用工具测试"""
+
+import threading
+
+import dspy
+
+from src.utils.parallel import run_in_parallel
+
+
+def test_results_keep_call_order():
+    assert run_in_parallel(lambda: 1, lambda: 2, lambda: 3) == [1, 2, 3]
+    assert run_in_parallel(lambda: "only") == ["only"]
+    assert run_in_parallel() == []
+
+
+def test_calls_run_concurrently():
+    barrier = threading.Barrier(3, timeout=5)
+
+    def call():
+        barrier.wait()
+        return threading.current_thread().name
+
+    names = run_in_parallel(call, call, call)
+
+    assert names[0] == threading.current_thread().name
+    assert len(set(names)) == 3
+
+
+def test_workers_see_caller_dspy_settings():
+    with dspy.context(trace=["marker"]):
+        traces = run_in_parallel(lambda: dspy.settings.trace, lambda: dspy.settings.trace)
+
+    assert traces == [["marker"], ["marker"]]
+
+
+def test_nested_calls_run_in_the_worker_thread():
+    def nested():
+        worker = threading.current_thread().name
+        inner = run_in_parallel(lambda: threading.current_thread().name,
+                                lambda: threading.current_thread().name)
+        return worker, inner
+
+    _, (worker, inner) = run_in_parallel(lambda: None, nested)
+
+    assert inner == [worker, worker]
@@ -0,0 +1,84 @@
+"""报告生成模块测试"""
+
+from datetime import datetime
+
+import dspy
+import pytest
+
+from src.dspy_modules.diagnostic_agent import DiagnosticResult
+from src.dspy_modules.report_generator import ExecutionResult, ReportGenerator
+
+
+@pytest.fixture
+def generator():
+    return ReportGenerator()
+
+
+def test_anomalies_use_strict_threshold(generator):
+    metrics = {"cpu": 0.9, "memory": 0.8, "disk": 1, "host": "node-1", "net": 0.5}
+
+    anomalies = generator._detect_anomalies(metrics)
+
+    assert [(a["metric"], a["value"]) for a in anomalies] == [("cpu", 0.9), ("disk", 1)]
+    assert all(a["threshold"] == 0.8 for a in anomalies)
+
+
+def test_health_score_deducts_per_anomaly(generator):
+    assert generator._assess_system_health({"cpu": 0.8})["status"] == "healthy"
+
+    health = generator._assess_system_health({"cpu": 0.9, "memory": 0.95, "disk": 0.99, "net": 0.85})
+
+    assert health["overall_score"] == pytest.approx(0.6)
+    assert health["status"] == "warning"
+
+
+def _diagnosis():
+    return DiagnosticResult(incident_id="INC-1", root_cause="disk full", confidence_score=0.9,
+                            impact_assessment="high", business_impact="checkout down",
+                            recovery_time_estimate="10m")
+
+
+def _execution():
+    return ExecutionResult(plan_id="PLAN-1", execution_start=datetime(2024, 1, 1, 10, 0),
+                           execution_end=datetime(2024, 1, 1, 10, 5), status="partial",
+                           executed_steps=["step_1"], failed_steps=["step_2"])
+
+
+def test_build_timeline_from_records(generator):
+    timeline = generator._build_timeline(_diagnosis(), _execution())
+
+    assert [entry["sequence"] for entry in timeline] == list(range(1, 8))
+    assert [entry["event"] for entry in timeline] == [
+        "Incident detected: INC-1",
+        "Root cause identified: disk full",
+        "Impact assessed: checkout down",
+        "Execution started",
+        "Step executed: step_1",
+        "Step failed: step_2",
+        "Execution ended: partial",
+    ]
+    assert timeline[0]["timestamp"] == "2024-01-01T10:00:00"
+    assert timeline[-1]["timestamp"] == "2024-01-01T10:05:00"
+    assert timeline[-1]["type"] == "resolution"
+
+
+def test_report_uses_deterministic_timeline_by_default(monkeypatch, generator):
+    calls = []
+
+    def report_generator(**kwargs):
+        calls.append("report")
+        return dspy.Prediction(report_summary="summary", recommendations="add alerts")
+
+    def lessons_analyzer(**kwargs):
+        calls.append("lessons")
+        return dspy.Prediction(lessons="monitor disk")
+
+    monkeypatch.setattr(generator, "report_generator", report_generator)
+    monkeypatch.setattr(generator, "lessons_analyzer", lessons_analyzer)
+
+    report = generator.generate_incident_report(_diagnosis(), None, _execution())
+
+    assert sorted(calls) == ["lessons", "report"]
+    assert not hasattr(generator, "timeline_generator")
+    assert report.timeline == generator._build_timeline(_diagnosis(), _execution())
+    assert report.lessons_learned == ["monitor disk"]
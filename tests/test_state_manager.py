@@ -0,0 +1,93 @@
+"""状态管理器与状态 reducer 测试"""
+
+import pytest
+from langgraph.graph import END, START, StateGraph
+
+from src.langgraph_workflow.state_manager import OpsState, StateManager
+
+
+def _run_graph(manager: StateManager, state: OpsState, *nodes):
+    """按顺序串联节点编译一个最小工作流并执行"""
+    graph = StateGraph(OpsState)
+    previous = START
+    for index, node in enumerate(nodes):
+        name = f"node_{index}"
+        graph.add_node(name, node)
+        graph.add_edge(previous, name)
+        previous = name
+    graph.add_edge(previous, END)
+    return graph.compile().invoke(state)
+
+
+def test_reducers_append_deltas():
+    manager = StateManager()
+    state = manager.initialize_state("wf-1")
+    state["errors"] = ["initial"]
+
+    def first(current):
+        return manager.build_update(current, {
+            "historical_alerts": [{"alert_id": "a1"}],
+            "incident_history": [{"id": 1}],
+            "workflow_stage": "alerting",
+        })
+
+    def second(current):
+        return manager.error_update("boom")
+
+    def third(current):
+        return manager.build_update(current, {
+            "historical_alerts": [{"alert_id": "a2"}],
+            "incident_history": [{"id": 2}],
+        })
+
+    result = _run_graph(manager, state, first, second, third)
+
+    assert result["errors"] == ["initial", "boom"]
+    assert [alert["alert_id"] for alert in result["historical_alerts"]] == ["a1", "a2"]
+    assert result["incident_history"] == [{"id": 1}, {"id": 2}]
+    assert result["workflow_stage"] == "alerting"
+
+
+def test_build_update_keeps_only_known_fields():
+    manager = StateManager()
+    state = manager.initialize_state("wf-1")
+
+    delta = manager.build_update(state, {"workflow_status": "paused", "unknown": 1})
+
+    assert delta["workflow_status"] == "paused"
+    assert "unknown" not in delta
+    assert "last_update" in delta
+
+
+def test_build_update_rejects_invalid_stage():
+    manager = StateManager()
+    state = manager.initialize_state("wf-1")
+
+    with pytest.raises(ValueError):
+        manager.build_update(state, {"workflow_stage": "nowhere"})
+
+
+def test_release_keeps_current_state_out_of_pool():
+    manager = StateManager()
+    state = manager.initialize_state("wf-1")
+
+    manager.release(state)
+    assert manager.current_state is state
+    assert state["workflow_id"] == "wf-1"
+
+    other = manager.borrow()
+    manager.release(other)
+    manager.release(other)
+    assert len(manager._pool) == 1
+
+
+def test_track_state_records_history():
+    manager = StateManager()
+    state = manager.initialize_state("wf-1")
+
+    merged = dict(state, workflow_stage="alerting")
+    manager.track_state(merged)
+    manager.track_state(merged, record=False)
+
+    assert manager.current_state is merged
+    assert [s["workflow_stage"] for s in manager.get_state_history()] == ["monitoring", "alerting"]
@@ -0,0 +1,41 @@
+"""执行计划步骤分批测试"""
+
+from src.agents.intelligent_ops_agent import IntelligentOpsAgent
+
+partition = IntelligentOpsAgent._partition_step_waves
+
+
+def _step(step_id, *dependencies):
+    return {"step_id": step_id, "dependencies": list(dependencies)}
+
+
+def _ids(waves):
+    return [[step["step_id"] for step in wave] for wave in waves]
+
+
+def test_independent_steps_form_one_wave():
+    steps = [_step("a"), _step("b"), {"step_id": "c", "dependencies": None}]
+
+    assert _ids(partition(steps)) == [["a", "b", "c"]]
+
+
+def test_dependency_chain_and_fan_in():
+    steps = [_step("d", "b", "c"), _step("b", "a"), _step("a"), _step("c", "a")]
+
+    assert _ids(partition(steps)) == [["a"], ["b", "c"], ["d"]]
+
+
+def test_missing_dependency_is_treated_as_satisfied():
+    steps = [_step("a", "not_in_plan"), _step("b", "a")]
+
+    assert _ids(partition(steps)) == [["a"], ["b"]]
+
+
+def test_cycle_runs_remaining_steps_in_last_wave():
+    steps = [_step("a"), _step("b", "c"), _step("c", "b"), _step("d", "a")]
+
+    assert _ids(partition(steps)) == [["a"], ["d"], ["b", "c"]]
+
+
+def test_empty_plan():
+    assert partition([]) == []